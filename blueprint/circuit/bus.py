@@ -26,6 +26,9 @@ Output = int(2)
 Setting = int(3)
 Bad = int(4)
 
+# Linked-data reference kind, for the connector types
+ConnectorKinds = {Input: 'inputs', Output: 'outputs', Setting: 'settings'}
+
 class Wire:
 
     def __init__(self, 
@@ -245,6 +248,21 @@ class Wire:
             self.errors.append(event.ValidationEvent(event.BPError, "Incorrect wiring", None, f"from: {self.from_param_ref} to: {self.to_param_ref}"))
 
 
+    def _param_ref(self, node, connector_type, param_name):
+        if isinstance(node, blueprint.Blueprint):
+            return '$blueprint.' + ConnectorKinds[connector_type] + '.' + param_name
+        return '$module.' + node.name + '.' + ConnectorKinds[connector_type] + '.' + param_name
+
+    def link(self, from_param, to_param):
+        """
+        Attach the parameters at both ends of the wire, when the parameters are already added & linked
+        in the Blueprint and Module (instead of the commit)
+        """
+        self.from_param     = from_param
+        self.to_param       = to_param
+        self.from_param_ref = self._param_ref(self.from_node, self.from_connector_type, self.from_param_name)
+        self.to_param_ref   = self._param_ref(self.to_node, self.to_connector_type, self.to_param_name)
+
     def commit(self):
         
         if self.from_connector_type == Bad or self.to_connector_type == Bad:
@@ -534,6 +552,8 @@ class Circuit:
         """
         self.bp     = bp # Blueprint
         self.fleet  = [] # List of buses
+        self._buses = dict() # (from node name, to node name) -> bus, in the fleet
+        self._modules = dict() # module name -> module
 
         self._prepare()
 
@@ -545,11 +565,13 @@ class Circuit:
         if from_node == None or to_node == None:
             return None
 
-        for b in self.fleet:
-            if b.from_node.name == from_node.name and b.to_node.name == to_node.name:
-                return b
-        
-        return None
+        return self._buses.get((from_node.name, to_node.name))
+
+    def _get_module(self, mod_name):
+        if mod_name in self._modules:
+            return self._modules[mod_name]
+        (mod, error) = self.bp.get_module(mod_name)
+        return mod
 
     def _add_wire(self, from_node, from_param_name, to_node, to_param_name):
         if from_node == None or to_node == None:
@@ -564,11 +586,28 @@ class Circuit:
             new_wire = Wire(from_node, from_param_name, to_node, to_param_name)
             new_bus = WireBus(from_node, to_node, [new_wire]) 
             self.fleet.append(new_bus)
+            self._buses[(from_node.name, to_node.name)] = new_bus
         else:
             new_wire = Wire(from_node, from_param_name, to_node, to_param_name)
             bus.add_wire(from_param_name, to_param_name)
 
+    def add_wires(self, wires: List[Wire]):
+        """
+        Add the wires (committed, or linked) to the buses of the circuit
+        """
+        for w in wires:
+            bus = self._find_bus(w.from_node, w.to_node)
+            if bus == None:
+                bus = WireBus(w.from_node, w.to_node, [])
+                self.fleet.append(bus)
+                self._buses[(w.from_node.name, w.to_node.name)] = bus
+            bus.wires.append(w)
+
     def _prepare(self):
+        if hasattr(self.bp, 'modules') and self.bp.modules != None:
+            for mod in self.bp.modules:
+                self._modules.setdefault(mod.name, mod)
+
         if hasattr(self.bp, 'outputs') and self.bp.outputs != None:
             for outp in self.bp.outputs:
                 val = outp.get_value()
@@ -581,7 +620,7 @@ class Circuit:
                         type = split_val[2]
                         var_name = split_val[3]
 
-                        (from_mod, error) = self.bp.get_module(mod_name)
+                        from_mod = self._get_module(mod_name)
                         self._add_wire(from_mod, var_name, self.bp, outp.name)
                     
                     elif val.startswith('$blueprint.'):
@@ -607,7 +646,7 @@ class Circuit:
                                 type = split_val[2]
                                 var_name = split_val[3]
 
-                                (from_mod, error) = self.bp.get_module(mod_name)
+                                from_mod = self._get_module(mod_name)
                                 self._add_wire(from_mod, var_name, mod, inp.name)
                             
                             elif val.startswith('$blueprint.'):
@@ -635,7 +674,7 @@ class Circuit:
                                 type = split_val[2]
                                 var_name = split_val[3]
 
-                                (from_mod, error) = self.bp.get_module(mod_name)
+                                from_mod = self._get_module(mod_name)
                                 self._add_wire(from_mod, var_name, mod, envp.name)
                             
                             elif val.startswith('$blueprint.'):
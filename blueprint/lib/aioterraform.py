@@ -0,0 +1,287 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import re
+import json
+import random
+import platform
+import asyncio
+from collections import deque
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+TERRAFORM_BIN = "terraform"
+
+# Return code reported when a terraform command is killed after its timeout
+TimeoutReturnCode = -9
+
+# Number of the last output lines retained in memory (per stream), for the streamed commands
+DefaultTailLines = 200
+
+# Retry of the terraform commands that fail with a transient error (exponential backoff, with jitter)
+DefaultRetryDelay   = 5
+MaxRetryDelay       = 300
+
+# Errors from the providers, registries & backends, that are likely to succeed on retry
+TransientErrorPatterns = re.compile("|".join([
+    r"rate limit",
+    r"too many requests",
+    r"\b429\b",
+    r"\b50[234]\b",
+    r"bad gateway",
+    r"service unavailable",
+    r"gateway time-?out",
+    r"temporarily unavailable",
+    r"connection reset",
+    r"connection refused",
+    r"i/o timeout",
+    r"tls handshake timeout",
+    r"timeout awaiting response headers",
+    r"no such host",
+    r"unexpected eof",
+    r"error acquiring the state lock",
+]), re.IGNORECASE)
+
+def is_transient_failure(lines) -> bool:
+    """
+    Classify the failure of a terraform command, from its error output: returns true for a transient error
+    """
+    for line in lines:
+        if TransientErrorPatterns.search(line):
+            return True
+    return False
+
+def backoff_delay(attempt, base_delay=DefaultRetryDelay, max_delay=MaxRetryDelay) -> float:
+    """
+    Delay (in seconds) before the retry attempt (0, 1, 2 ...): exponential backoff, with jitter
+    """
+    delay = min(max_delay, base_delay * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def provider_install_stats(lines):
+    """
+    Count the providers reused (from the plugin cache, or previously installed) & downloaded,
+    in the output of terraform init.  Returns the tuple (hits, misses)
+    """
+    hits = 0
+    misses = 0
+    for line in lines:
+        line = line.strip()
+        if line.startswith("- Using ") and \
+            (line.endswith("from the shared cache directory") or line.startswith("- Using previously-installed ")):
+            hits += 1
+        elif line.startswith("- Installing "):
+            misses += 1
+    return (hits, misses)
+
+# Dependency lock file of a module (the provider versions selected by terraform init)
+LockFile = ".terraform.lock.hcl"
+LockedProviderPattern = re.compile(r'provider\s+"([^"]+)"\s*\{[^}]*?\bversion\s*=\s*"([^"]+)"', re.DOTALL)
+
+# Terraform platform names (GOOS_GOARCH), for the python platform names
+PlatformSystems = {"linux": "linux", "darwin": "darwin", "windows": "windows", "freebsd": "freebsd", "openbsd": "openbsd"}
+PlatformMachines = {"x86_64": "amd64", "amd64": "amd64", "aarch64": "arm64", "arm64": "arm64",
+                    "i386": "386", "i686": "386", "x86": "386", "armv7l": "arm", "armv6l": "arm"}
+
+def locked_providers(working_dir):
+    """
+    List the providers (address, version) in the dependency lock file of the module, or None if there is no lock file
+    """
+    lock_file = os.path.join(working_dir, LockFile)
+    if not os.path.exists(lock_file):
+        return None
+    with open(lock_file) as f:
+        return LockedProviderPattern.findall(f.read())
+
+def plugin_platform() -> str:
+    system = platform.system().lower()
+    machine = platform.machine().lower()
+    return PlatformSystems.get(system, system) + "_" + PlatformMachines.get(machine, machine)
+
+def is_plugin_cache_warm(working_dir, plugin_cache_dir) -> bool:
+    """
+    Returns true, if all the providers in the dependency lock file of the module are in the plugin cache
+    (<cache>/<hostname>/<namespace>/<type>/<version>/<os_arch>): terraform init then only reads the plugin cache
+    """
+    if plugin_cache_dir == None:
+        return False
+    providers = locked_providers(working_dir)
+    if providers == None:
+        return False
+    for (address, version) in providers:
+        if not os.path.isdir(os.path.join(plugin_cache_dir, *address.split("/"), version, plugin_platform())):
+            return False
+    return True
+
+class AsyncTerraformRunner:
+
+    def __init__(self, working_dir, var_file=None, terraform_bin=None, env=None, timeout=None, line_handler=None, kill_grace=10,
+                    tail_lines=DefaultTailLines, json_output=False):
+        """Asyncio based runner for the terraform commands.
+
+        :param working_dir: Terraform template folder (cwd for the terraform process)
+        :param var_file: Name of the tfvars file, relative to the working_dir
+        :param terraform_bin: Terraform executable (default: `terraform` from the $PATH)
+        :param env: Environment variables for the terraform process (default: os.environ)
+        :param timeout: Timeout (in seconds) for each terraform command, None to wait forever
+        :param line_handler: Callback (stream_name, line) invoked for every line of output
+        :param kill_grace: Seconds to wait after SIGTERM, before the terraform process is killed
+        :param tail_lines: Number of the last output lines retained (per stream) for plan, apply, destroy & init
+        :param json_output: Run plan, apply & destroy with -json, and parse the machine-readable events
+        """
+        self.working_dir = str(working_dir)
+        self.var_file = var_file
+        self.terraform_bin = terraform_bin if terraform_bin != None else TERRAFORM_BIN
+        self.env = env
+        self.timeout = timeout
+        self.line_handler = line_handler
+        self.kill_grace = kill_grace
+        self.tail_lines = tail_lines
+        self.json_output = json_output
+        # Parsed from the -json events of the last command
+        self.diagnostics = []
+        self.change_summary = None
+
+    def _json_args(self):
+        return ["-json"] if self.json_output else []
+
+    def _var_file_args(self):
+        if self.var_file == None:
+            return []
+        if not os.path.exists(os.path.join(self.working_dir, self.var_file)):
+            return []
+        return ["-var-file=" + self.var_file]
+
+    async def init(self):
+        return await self.cmd("init", "-input=false", "-no-color")
+
+    async def plan(self):
+        return await self.cmd("plan", "-input=false", "-no-color", *self._json_args(), *self._var_file_args(),
+                                json_events=self.json_output)
+
+    async def apply(self):
+        return await self.cmd("apply", "-input=false", "-no-color", "-auto-approve", *self._json_args(), *self._var_file_args(),
+                                json_events=self.json_output)
+
+    async def destroy(self):
+        return await self.cmd("destroy", "-input=false", "-no-color", "-auto-approve", *self._json_args(), *self._var_file_args(),
+                                json_events=self.json_output)
+
+    async def output(self):
+        """
+        Run `terraform output -json`, and returns the output dict
+        (same structure as python_terraform: {name: {"value": ..., "type": ..., "sensitive": ...}}),
+        or None, if the command fails or its output cannot be decoded
+        """
+        ret_code, stdout, stderr = await self.cmd("output", "-json", stream=False)
+        if ret_code != 0:
+            logr.error("terraform output failed in " + self.working_dir + ", return code: " + str(ret_code) + "\n" + "\n".join(stderr))
+            return None
+        try:
+            out_dict = json.loads("\n".join(stdout))
+        except ValueError:
+            logr.error("Error decoding terraform output in " + self.working_dir)
+            return None
+        return out_dict if isinstance(out_dict, dict) else None
+
+    async def cmd(self, *args, stream=True, json_events=False):
+        """
+        Run a terraform command, and returns the tuple (ret_code, stdout_lines, stderr_lines).
+        The output lines are streamed to the line_handler, as they are produced; only the last tail_lines
+        (per stream) are returned for a streamed command.  The complete output is returned, if stream is False.
+        With json_events, the stdout lines are parsed as terraform machine-readable (-json) events.
+        """
+        self.diagnostics = []
+        self.change_summary = None
+        logr.debug("Running terraform " + " ".join(args) + " in " + self.working_dir)
+        proc = await asyncio.create_subprocess_exec(self.terraform_bin, *args,
+                                                    cwd=self.working_dir,
+                                                    env=self.env,
+                                                    stdin=asyncio.subprocess.DEVNULL,
+                                                    stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE)
+        if stream:
+            stdout = deque(maxlen=self.tail_lines)
+            stderr = deque(maxlen=self.tail_lines)
+        else:
+            stdout = []
+            stderr = []
+        readers = asyncio.gather(self._read_lines(proc.stdout, "stdout", stdout, stream, json_events),
+                                 self._read_lines(proc.stderr, "stderr", stderr, stream, False))
+        try:
+            await asyncio.wait_for(asyncio.shield(readers), self.timeout)
+            ret_code = await proc.wait()
+        except asyncio.TimeoutError:
+            logr.error("terraform " + args[0] + " timed out after " + str(self.timeout) + "s in " + self.working_dir)
+            await self._terminate(proc)
+            await readers
+            stderr.append("terraform " + args[0] + " timed out after " + str(self.timeout) + "s")
+            return (TimeoutReturnCode, list(stdout), list(stderr))
+        except asyncio.CancelledError:
+            logr.info("terraform " + args[0] + " cancelled in " + self.working_dir)
+            await self._terminate(proc)
+            readers.cancel()
+            raise
+
+        return (ret_code, list(stdout), list(stderr))
+
+    async def _read_lines(self, reader, stream_name, lines, stream, json_events):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            line = line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if json_events:
+                line = self._parse_json_event(line)
+            lines.append(line)
+            if stream and self.line_handler != None:
+                self.line_handler(stream_name, line)
+
+    def _parse_json_event(self, line):
+        """
+        Parse a terraform machine-readable event; collect the error diagnostics & the change summary.
+        Returns the human-readable message of the event.
+        """
+        try:
+            ev = json.loads(line)
+        except ValueError:
+            return line
+        if not isinstance(ev, dict):
+            return line
+        ev_type = ev.get("type")
+        if ev_type == "diagnostic":
+            diag = ev.get("diagnostic", {})
+            if diag.get("severity") == "error":
+                message = str(diag.get("summary", ""))
+                if diag.get("detail"):
+                    message += ": " + str(diag.get("detail"))
+                self.diagnostics.append(message)
+        elif ev_type == "change_summary":
+            self.change_summary = ev.get("changes")
+        return str(ev.get("@message", line))
+
+    async def _terminate(self, proc):
+        if proc.returncode != None:
+            return
+        try:
+            proc.terminate()
+            await asyncio.wait_for(proc.wait(), self.kill_grace)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
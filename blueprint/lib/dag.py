@@ -98,6 +98,143 @@ class BlueprintGraph():
                 return n
         raise ValueError("Circular dependencies in graph - No independent nodes")
 
+    def getIndependentNodes(self):
+        """
+        List all the nodes without pending dependencies (in the order of the nodes)
+        """
+        dag_keys = self.dag.keys()
+        independent_nodes = []
+        for n in self.nodes:
+            if n not in dag_keys or len(self.dag[n]) == 0:
+                independent_nodes.append(n)
+        return independent_nodes
+
+    def getDependencies(self, node, skip_nodes=()):
+        """
+        List all the nodes, that the node depends on (directly or transitively).
+        The skip_nodes are neither listed nor traversed.
+        """
+        dependencies = []
+        stack = [node]
+        while len(stack) > 0:
+            n = stack.pop()
+            for d in self.dag.get(n, []):
+                if d not in skip_nodes and d != node and d not in dependencies:
+                    dependencies.append(d)
+                    stack.append(d)
+        return dependencies
+
+    def getDependents(self, node, skip_nodes=()):
+        """
+        List all the nodes, that depend on the node (directly or transitively).
+        The skip_nodes are neither listed nor traversed.
+        """
+        reverse_dag = defaultdict(list)
+        for n in list(self.dag.keys()):
+            for d in self.dag[n]:
+                reverse_dag[d].append(n)
+        dependents = []
+        stack = [node]
+        while len(stack) > 0:
+            n = stack.pop()
+            for d in reverse_dag.get(n, []):
+                if d not in skip_nodes and d != node and d not in dependents:
+                    dependents.append(d)
+                    stack.append(d)
+        return dependents
+
+    def getTopologicalOrder(self):
+        """
+        List the nodes, dependencies first
+        """
+        pending = dict()
+        dependents = defaultdict(list)
+        for n in self.nodes:
+            deps = self.dag.get(n, [])
+            pending[n] = len(deps)
+            for d in deps:
+                dependents[d].append(n)
+        ready = [n for n in self.nodes if pending[n] == 0]
+        order = []
+        while len(ready) > 0:
+            n = ready.pop(0)
+            order.append(n)
+            for m in dependents[n]:
+                pending[m] -= 1
+                if pending[m] == 0:
+                    ready.append(m)
+        if len(order) != len(self.nodes):
+            raise ValueError("Circular dependencies in graph - No independent nodes")
+        return order
+
+    def getCriticalPath(self, durations, default_duration=0):
+        """
+        Critical path analysis of the graph, with the durations (node -> seconds) of the nodes.
+        Returns a dict with
+            earliest_start, latest_start, slack, remaining (node -> seconds; remaining is the longest path from the start of the node to the end),
+            critical_path (list of nodes) & length (seconds)
+        """
+        order = self.getTopologicalOrder()
+        dependents = defaultdict(list)
+        for n in order:
+            for d in self.dag.get(n, []):
+                dependents[d].append(n)
+
+        def duration(n):
+            return durations.get(n, default_duration)
+
+        earliest_start = dict()
+        earliest_finish = dict()
+        for n in order:
+            earliest_start[n] = max([earliest_finish[d] for d in self.dag.get(n, [])], default=0)
+            earliest_finish[n] = earliest_start[n] + duration(n)
+        length = max(earliest_finish.values(), default=0)
+
+        latest_start = dict()
+        remaining = dict()
+        for n in reversed(order):
+            latest_finish = min([latest_start[m] for m in dependents[n]], default=length)
+            latest_start[n] = latest_finish - duration(n)
+            remaining[n] = duration(n) + max([remaining[m] for m in dependents[n]], default=0)
+
+        slack = {n: latest_start[n] - earliest_start[n] for n in order}
+
+        # Walk back from the node that finishes last, through the dependencies that finish last
+        critical_path = []
+        if len(order) > 0:
+            n = max(order, key=lambda x: earliest_finish[x])
+            while n != None:
+                critical_path.append(n)
+                deps = self.dag.get(n, [])
+                n = max(deps, key=lambda x: earliest_finish[x]) if len(deps) > 0 else None
+            critical_path.reverse()
+
+        return {"earliest_start": earliest_start, "latest_start": latest_start, "slack": slack, "remaining": remaining,
+                "critical_path": critical_path, "length": length}
+
+    def estimateMakespan(self, durations, parallelism=1, default_duration=0, free_nodes=()):
+        """
+        Simulate the run of the graph with upto parallelism nodes at a time (longest remaining path first),
+        and returns the estimated completion time (seconds).  The free_nodes do not take a slot.
+        """
+        remaining = self.getCriticalPath(durations, default_duration)["remaining"]
+        pending = {n: set(self.dag.get(n, [])) for n in self.nodes}
+        running = dict() # node -> finish time
+        now = 0
+        while len(pending) > 0 or len(running) > 0:
+            ready = sorted([n for n in pending if len(pending[n]) == 0], key=lambda x: -remaining[x])
+            for n in ready:
+                if n in free_nodes or len([r for r in running if r not in free_nodes]) < max(1, parallelism):
+                    del pending[n]
+                    running[n] = now + (0 if n in free_nodes else durations.get(n, default_duration))
+            if len(running) == 0:
+                break
+            n = min(running, key=lambda x: running[x])
+            now = running.pop(n)
+            for m in pending:
+                pending[m].discard(n)
+        return now
+
     def isEmpty(self):
         return len(self.nodes) == 0
 
@@ -0,0 +1,201 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import re
+import json
+import random
+import asyncio
+import hashlib
+
+from blueprint.lib import aioterraform
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+# State of the fake terraform engine, saved in the terraform template folder
+FakeStateFile = "fake-terraform.tfstate.json"
+
+FakeVersion = "0.0.0-fake"
+
+OutputPattern = re.compile(r'^\s*output\s+"([^"]+)"', re.MULTILINE)
+
+class FakeTerraformEngine:
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, transient_failure_rate=0.0, fail_modules=None, seed=0):
+        """
+        Fake terraform engine: simulates terraform init, plan, apply, destroy & output in python,
+        without the terraform executable, the providers or the cloud.
+        Used to test & benchmark the scheduling of (large) blueprints.
+
+        :param latency: Duration (in seconds) of each simulated terraform command
+        :param jitter: Random variation (in seconds) added to the latency of each command
+        :param failure_rate: Probability (0 to 1) that a command fails, with a permanent error
+        :param transient_failure_rate: Probability (0 to 1) that a command fails, with a transient error (retried)
+        :param fail_modules: Names of the modules, for which apply, plan & destroy always fail
+        :param seed: Seed for the random latency & failures (the same seed gives the same run)
+        """
+        if failure_rate < 0 or failure_rate > 1 or transient_failure_rate < 0 or transient_failure_rate > 1:
+            raise ValueError("Invalid failure rate, expected a value between 0 and 1")
+        if latency < 0 or jitter < 0:
+            raise ValueError("Invalid latency, expected a positive value")
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.transient_failure_rate = transient_failure_rate
+        self.fail_modules = set(fail_modules) if fail_modules != None else set()
+        self.seed = seed
+
+    def runner(self, mod_name, working_dir, var_file=None, timeout=None, line_handler=None):
+        return FakeTerraformRunner(self, mod_name, working_dir, var_file, timeout, line_handler)
+
+    def random(self, mod_name, command, call_number):
+        # Independent of the order in which the modules run
+        return random.Random(str(self.seed) + ":" + str(mod_name) + ":" + command + ":" + str(call_number))
+
+def fake_value(mod_name, output_name) -> str:
+    """
+    Value of a simulated output, derived from the module & the output names
+    """
+    digest = hashlib.sha256((str(mod_name) + "/" + str(output_name)).encode("utf-8")).hexdigest()
+    return str(mod_name) + "-" + str(output_name) + "-" + digest[:8]
+
+class FakeTerraformRunner:
+
+    def __init__(self, engine, mod_name, working_dir, var_file=None, timeout=None, line_handler=None):
+        """
+        Same interface as aioterraform.AsyncTerraformRunner; each command returns (ret_code, stdout_lines, stderr_lines)
+        """
+        self.engine = engine
+        self.mod_name = mod_name
+        self.working_dir = str(working_dir)
+        self.var_file = var_file
+        self.timeout = timeout
+        self.line_handler = line_handler
+        self.calls = dict() # command -> number of calls
+        self.diagnostics = []
+        self.change_summary = None
+
+    async def init(self):
+        return await self.cmd("init", ["Initializing the backend...",
+                                       "Initializing provider plugins...",
+                                       "Terraform (" + FakeVersion + ") has been successfully initialized!"])
+
+    async def plan(self):
+        changes = self._changes("plan")
+        return await self.cmd("plan", ["Plan: " + str(changes["add"]) + " to add, " + str(changes["change"]) + " to change, " +
+                                        str(changes["remove"]) + " to destroy."], changes)
+
+    async def apply(self):
+        changes = self._changes("apply")
+        ret = await self.cmd("apply", ["Apply complete! Resources: " + str(changes["add"]) + " added, " + str(changes["change"]) +
+                                        " changed, " + str(changes["remove"]) + " destroyed."], changes)
+        if ret[0] == 0:
+            self._save_state({"inputs": self._input_hash(), "outputs": self._outputs()})
+        return ret
+
+    async def destroy(self):
+        changes = {"add": 0, "change": 0, "remove": 1 if self._load_state() != None else 0, "operation": "destroy"}
+        ret = await self.cmd("destroy", ["Destroy complete! Resources: " + str(changes["remove"]) + " destroyed."], changes)
+        if ret[0] == 0 and os.path.exists(self._state_file()):
+            os.remove(self._state_file())
+        return ret
+
+    async def output(self):
+        state = self._load_state()
+        if state == None:
+            return {}
+        return state.get("outputs", {})
+
+    async def cmd(self, command, lines, changes=None):
+        """
+        Simulate a terraform command: wait for the latency, then fail (as configured) or print the lines
+        """
+        self.diagnostics = []
+        self.change_summary = None
+        call_number = self.calls.get(command, 0)
+        self.calls[command] = call_number + 1
+        rnd = self.engine.random(self.mod_name, command, call_number)
+        logr.debug("Running fake terraform " + command + " in " + self.working_dir)
+
+        delay = self.engine.latency + rnd.uniform(0, self.engine.jitter)
+        if self.timeout != None and delay > self.timeout:
+            await asyncio.sleep(self.timeout)
+            stderr = ["terraform " + command + " timed out after " + str(self.timeout) + "s"]
+            return (aioterraform.TimeoutReturnCode, [], stderr)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        error = None
+        if command != "init" and self.mod_name in self.engine.fail_modules:
+            error = "Error: simulated failure of the module " + str(self.mod_name)
+        elif rnd.random() < self.engine.failure_rate:
+            error = "Error: simulated failure of terraform " + command
+        elif rnd.random() < self.engine.transient_failure_rate:
+            error = "Error: simulated 429 Too Many Requests, during terraform " + command
+        if error != None:
+            self.diagnostics.append(error)
+            self._print("stderr", error)
+            return (1, [], [error])
+
+        self.change_summary = changes
+        for line in lines:
+            self._print("stdout", line)
+        return (0, lines, [])
+
+    def _print(self, stream_name, line):
+        if self.line_handler != None:
+            self.line_handler(stream_name, line)
+
+    def _outputs(self):
+        # The output blocks of the terraform template
+        outputs = dict()
+        for file_name in sorted(os.listdir(self.working_dir)):
+            if not file_name.endswith(".tf"):
+                continue
+            with open(os.path.join(self.working_dir, file_name)) as tf_file:
+                for name in OutputPattern.findall(tf_file.read()):
+                    outputs[name] = {"value": fake_value(self.mod_name, name), "type": "string", "sensitive": False}
+        return outputs
+
+    def _input_hash(self):
+        if self.var_file == None:
+            return None
+        var_file_name = os.path.join(self.working_dir, self.var_file)
+        if not os.path.exists(var_file_name):
+            return None
+        with open(var_file_name, "rb") as var_file:
+            return hashlib.sha256(var_file.read()).hexdigest()
+
+    def _changes(self, operation):
+        state = self._load_state()
+        if state == None:
+            return {"add": 1, "change": 0, "remove": 0, "operation": operation}
+        changed = 1 if state.get("inputs") != self._input_hash() else 0
+        return {"add": 0, "change": changed, "remove": 0, "operation": operation}
+
+    def _state_file(self):
+        return os.path.join(self.working_dir, FakeStateFile)
+
+    def _load_state(self):
+        try:
+            with open(self._state_file()) as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state):
+        with open(self._state_file(), "w") as state_file:
+            json.dump(state, state_file, indent=2)
@@ -0,0 +1,112 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import hashlib
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+# Terraform source files, that can change the outcome of terraform init
+SourceFileSuffixes  = (".tf", ".tf.json", ".tfbackend", ".terraform.lock.hcl")
+SkipFolders         = (".terraform", ".git")
+
+# Environment variables, that can change the backend configuration for terraform init
+InitEnvPrefixes     = ("TF_CLI_ARGS", "TF_CLI_CONFIG_FILE", "TF_PLUGIN_CACHE_DIR", "TF_DATA_DIR")
+
+InitStateFile       = "blueprint-init.sha256"
+
+def list_source_files(working_dir):
+    """
+    List the terraform source files in the working_dir (sorted, relative path)
+    """
+    source_files = []
+    for root, dirs, files in os.walk(working_dir):
+        dirs[:] = [d for d in dirs if d not in SkipFolders]
+        for f in files:
+            if f.endswith(SourceFileSuffixes):
+                source_files.append(os.path.relpath(os.path.join(root, f), working_dir))
+    return sorted(source_files)
+
+def hash_files(working_dir, rel_file_names, digest=None):
+    digest = hashlib.sha256() if digest == None else digest
+    for f in rel_file_names:
+        digest.update(f.encode("utf-8") + b"\0")
+        with open(os.path.join(working_dir, f), "rb") as fd:
+            for chunk in iter(lambda: fd.read(65536), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest
+
+def hash_env(env, prefixes, digest=None):
+    digest = hashlib.sha256() if digest == None else digest
+    if env == None:
+        env = os.environ
+    for key in sorted(env.keys()):
+        if key.startswith(prefixes):
+            digest.update((key + "=" + str(env[key])).encode("utf-8") + b"\0")
+    return digest
+
+def init_fingerprint(working_dir, env=None) -> str:
+    """
+    Fingerprint of the terraform init inputs in the working_dir:
+    the source files (including the backend configuration), the .terraform.lock.hcl file
+    and the environment variables that change the backend configuration.
+    """
+    digest = hash_files(working_dir, list_source_files(working_dir))
+    digest = hash_env(env, InitEnvPrefixes, digest)
+    return digest.hexdigest()
+
+def apply_fingerprint(working_dir, tfvars_file=None, settings=None) -> str:
+    """
+    Fingerprint of the terraform apply inputs of a module:
+    the source files, the resolved input values (tfvars_file) and the module settings (dict).
+    """
+    digest = hash_files(working_dir, list_source_files(working_dir))
+    if tfvars_file != None and os.path.exists(os.path.join(working_dir, tfvars_file)):
+        digest = hash_files(working_dir, [tfvars_file], digest)
+    if settings != None:
+        digest = hash_env(settings, ("",), digest)
+    return digest.hexdigest()
+
+def _init_state_file(working_dir):
+    return os.path.join(working_dir, ".terraform", InitStateFile)
+
+def is_init_current(working_dir, env=None) -> bool:
+    """
+    Returns true, if terraform init was run in the working_dir & the init inputs have not changed since.
+    """
+    state_file = _init_state_file(working_dir)
+    if not os.path.exists(state_file):
+        return False
+    with open(state_file) as f:
+        saved_fingerprint = f.read().strip()
+    return saved_fingerprint == init_fingerprint(working_dir, env)
+
+def save_init_state(working_dir, env=None):
+    """
+    Record the fingerprint of the terraform init inputs, after a successful terraform init
+    """
+    terraform_dir = os.path.join(working_dir, ".terraform")
+    if not os.path.isdir(terraform_dir):
+        # terraform init (without providers or modules) does not create the .terraform folder
+        os.makedirs(terraform_dir, exist_ok=True)
+    with open(_init_state_file(working_dir), "w") as f:
+        f.write(init_fingerprint(working_dir, env))
+
+def clear_init_state(working_dir):
+    state_file = _init_state_file(working_dir)
+    if os.path.exists(state_file):
+        os.remove(state_file)
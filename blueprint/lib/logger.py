@@ -13,7 +13,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import logging
+import logging.handlers
 
 logr = logging.getLogger(__name__)
 # logging.basicConfig(filename = "logfile.log", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s', encoding='utf-8', level=logging.INFO)
+
+# Rotating log files for the terraform output of the modules
+ModuleLogMaxBytes   = 10 * 1024 * 1024
+ModuleLogBackups    = 3
+
+def module_logger(mod_name, log_dir, max_bytes=ModuleLogMaxBytes, backup_count=ModuleLogBackups):
+    """
+    Logger for the terraform output of a module, to a rotating log file (log_dir/mod_name.log).
+    The logger is specific to the log file (the modules of different blueprints can have the same name),
+    and the records are not propagated to the blueprint log.  Close the log file with close_module_logger.
+    """
+    log_file = os.path.abspath(os.path.join(log_dir, str(mod_name) + ".log"))
+    mod_logr = logging.getLogger("blueprint.terraform." + log_file)
+    mod_logr.propagate = False
+    mod_logr.setLevel(logging.INFO)
+    for h in mod_logr.handlers:
+        if isinstance(h, logging.handlers.RotatingFileHandler) and h.baseFilename == log_file:
+            return mod_logr
+    os.makedirs(log_dir, exist_ok=True)
+    fh = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    fh.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    mod_logr.addHandler(fh)
+    return mod_logr
+
+def close_module_logger(mod_logr):
+    """
+    Remove & close the log file handlers of a module logger (from module_logger)
+    """
+    for h in list(mod_logr.handlers):
+        mod_logr.removeHandler(h)
+        h.close()
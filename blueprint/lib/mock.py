@@ -13,77 +13,115 @@
 # limitations under the License.
 
 import os
+import hashlib
 import giturlparse
 from pathlib import Path
 import shutil
 
+# Signature of the generated template (the module parameters), to skip the generation when unchanged
+SignatureFile = ".blueprint-mock.sha256"
+
+# Changed whenever the generated templates change
+GeneratorVersion = "2"
+
 class MockTemplate:
-    def __init__(self, git_url, mod):
+    def __init__(self, git_url, mod, base_dir=None):
+        """
+        Generate a pseudo terraform template (vars.tf & output.tf) for the module, in the base_dir/mod.name folder.
+        The current directory is not changed, so that the templates of several modules can be generated concurrently.
+        """
         self.git_url = git_url
         self.mod_name = mod.name
-
-        cwd = os.getcwd()
-        d = Path(os.path.join(cwd, mod.name))
-        if d.exists() and d.is_dir():
-            shutil.rmtree(d)
+        if base_dir == None:
+            base_dir = os.getcwd()
 
         p = giturlparse.parse(git_url)
         folder_name = p.name
         # print(mod.name + "/" + folder_name)
-        d = Path(os.path.join(Path(cwd), mod.name, folder_name))
-        if d.exists() and d.is_dir():
-            shutil.rmtree(d)
-        d.mkdir(parents=True, exist_ok=True)
-        os.chdir(d)
+        d = Path(os.path.join(base_dir, mod.name, folder_name))
         self.working_dir = d
-        
+        self.generated = False
+
+        signature = self.signature(folder_name, mod.inputs, mod.outputs)
+        if self.is_current(signature):
+            # Same parameters as the existing template - keep it (and the state of the earlier runs)
+            return
+
+        md = Path(os.path.join(base_dir, mod.name))
+        if md.exists() and md.is_dir():
+            shutil.rmtree(md)
+        d.mkdir(parents=True, exist_ok=True)
+
         self.generate_vars_tf(mod.inputs)
         self.generate_output_tf(mod.outputs)
-        os.chdir(cwd)
+        with open(os.path.join(d, SignatureFile), 'w') as sig_file:
+            sig_file.write(signature)
+        self.generated = True
 
 
     def get_working_dir(self):
         return self.working_dir
 
+    def signature(self, folder_name, mod_inputs, mod_outputs):
+        digest = hashlib.sha256()
+        digest.update(("version:" + GeneratorVersion + "\n").encode("utf-8"))
+        digest.update(("source:" + str(self.git_url) + "/" + str(folder_name) + "\n").encode("utf-8"))
+        for p in (mod_inputs if mod_inputs != None else []):
+            digest.update(("input:" + str(p.name) + ":" + str(p.type) + ":" + str(p.value) + "\n").encode("utf-8"))
+        for p in (mod_outputs if mod_outputs != None else []):
+            digest.update(("output:" + str(p.name) + "\n").encode("utf-8"))
+        return digest.hexdigest()
+
+    def is_current(self, signature) -> bool:
+        d = self.working_dir
+        for file_name in (SignatureFile, "vars.tf", "output.tf"):
+            if not os.path.exists(os.path.join(d, file_name)):
+                return False
+        with open(os.path.join(d, SignatureFile)) as sig_file:
+            return sig_file.read().strip() == signature
+
     def generate_vars_tf(self, mod_inputs):
         
         var_temp_str1 = 'variable "{}" {{ \n  description = "About variable {}."\n}}\n\n'
         var_temp_str2 = 'variable "{}" {{ \n  description = "About variable {}."\n  default = "{}"\n}}\n\n'
 
         if mod_inputs == None:
-            with open("vars.tf", 'w') as var_file:
-                var_file.write("# Generated empty input var file \n\n")
+            self.write_file("vars.tf", ["# Generated empty input var file \n\n"])
             return
-        else:
-            with open("vars.tf", 'w') as var_file:
-                var_file.write("# Generated input var file \n\n")
-                for p in mod_inputs:
-                    if p.type == None or p.value == None:
-                        var_file.write(var_temp_str1.format(p.name, p.name))
+
+        # The file is written at once, with a single write
+        buf = ["# Generated input var file \n\n"]
+        for p in mod_inputs:
+            if p.type == None or p.value == None:
+                buf.append(var_temp_str1.format(p.name, p.name))
+            else:
+                if p.type.lower() == "string" :
+                    buf.append(var_temp_str2.format(p.name, p.name, p.value))
+                elif p.type.lower() == "boolean" :
+                    if p.value == True:
+                        buf.append(var_temp_str2.format(p.name, p.name, 'True'))
                     else:
-                        if p.type.lower() == "string" :
-                            var_file.write(var_temp_str2.format(p.name, p.name, p.value))
-                        elif p.type.lower() == "boolean" :
-                            if p.value == True:
-                                var_file.write(var_temp_str2.format(p.name, p.name, 'True'))
-                            else:
-                                var_file.write(var_temp_str2.format(p.name, p.name, 'False'))
-                        elif p.type.lower() == "number" or p.type.tolower() == "integer" :
-                            var_file.write(var_temp_str2.format(p.name, p.name, p.value))
-                        elif p.type.lower() == "date" or p.type.tolower() == "date-time" :
-                            var_file.write(var_temp_str2.format(p.name, p.name, "2000-12-30 19:21:03.478039"))
-                        else:
-                            var_file.write(var_temp_str1.format(p.name, p.name))
+                        buf.append(var_temp_str2.format(p.name, p.name, 'False'))
+                elif p.type.lower() == "number" or p.type.lower() == "integer" :
+                    buf.append(var_temp_str2.format(p.name, p.name, p.value))
+                elif p.type.lower() == "date" or p.type.lower() == "date-time" :
+                    buf.append(var_temp_str2.format(p.name, p.name, "2000-12-30 19:21:03.478039"))
+                else:
+                    buf.append(var_temp_str1.format(p.name, p.name))
+        self.write_file("vars.tf", buf)
 
     def generate_output_tf(self, mod_outputs):
 
         output_temp_str1 = 'output "{}" {{\n  value = "{}"\n}}\n\n'
         if mod_outputs == None:
-            with open("output.tf", 'w') as var_file:
-                var_file.write("# Generated empty output file \n\n")
+            self.write_file("output.tf", ["# Generated empty output file \n\n"])
             return
-        else:
-            with open("output.tf", 'w') as var_file:
-                var_file.write("# Generated output file \n\n")
-                for p in mod_outputs:
-                    var_file.write(output_temp_str1.format(p.name, p.name))
+
+        buf = ["# Generated output file \n\n"]
+        for p in mod_outputs:
+            buf.append(output_temp_str1.format(p.name, p.name))
+        self.write_file("output.tf", buf)
+
+    def write_file(self, file_name, buf):
+        with open(os.path.join(self.working_dir, file_name), 'w') as tf_file:
+            tf_file.write("".join(buf))
@@ -0,0 +1,527 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import re
+import json
+import threading
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+# Changed whenever the scanner output changes (part of the sync inspection cache key)
+ScannerVersion = "2"
+
+NumberPattern = re.compile(r'-?[0-9]+(\.[0-9]+)?([eE][+-]?[0-9]+)?')
+IdentifierPattern = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+HeredocPattern = re.compile(r'<<(-?)([A-Za-z_][A-Za-z0-9_-]*)[ \t]*\r?\n')
+
+# Scanned files (absolute file name -> (mtime, size, variables, outputs))
+_file_cache = dict()
+_file_cache_lock = threading.Lock()
+
+class _NotLiteral(Exception):
+    pass
+
+class _Parser:
+    """
+    Minimal HCL parser: the blocks & attributes of a terraform file.
+    The literal values (strings, numbers, bools, null, lists & objects) are decoded, the other expressions
+    (references, function calls, templates) are returned as their source text.
+    """
+
+    def __init__(self, text, file_name):
+        self.text = text
+        self.file_name = file_name
+        self.pos = 0
+
+    def error(self, message):
+        line = self.text.count("\n", 0, self.pos) + 1
+        raise ValueError("Error scanning " + str(self.file_name) + ", line " + str(line) + " : " + message)
+
+    def line(self, pos):
+        return self.text.count("\n", 0, pos) + 1
+
+    def peek(self, n=1):
+        return self.text[self.pos:self.pos + n]
+
+    def eof(self):
+        return self.pos >= len(self.text)
+
+    def skip_ws(self, newlines=True):
+        text = self.text
+        while self.pos < len(text):
+            c = text[self.pos]
+            if c in " \t\r" or (newlines and c == "\n"):
+                self.pos += 1
+            elif c == "#" or text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = len(text) if end < 0 else end
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                if end < 0:
+                    self.error("unterminated comment")
+                self.pos = end + 2
+            else:
+                break
+
+    # ===================================
+    # Blocks & attributes
+
+    def parse_file(self):
+        """
+        Returns the list of the top level blocks: (type, labels, attributes, line)
+        """
+        blocks = []
+        while True:
+            self.skip_ws()
+            if self.eof():
+                return blocks
+            start = self.pos
+            name = self.identifier()
+            self.skip_ws(newlines=False)
+            if self.peek() == "=":
+                # Top level attribute (not valid in a terraform file); skip it
+                self.pos += 1
+                self.expression()
+                continue
+            labels = self.labels()
+            attributes = self.body()
+            blocks.append((name, labels, attributes, self.line(start)))
+
+    def identifier(self):
+        m = IdentifierPattern.match(self.text, self.pos)
+        if m == None:
+            self.error("expected an identifier, found " + repr(self.peek(10)))
+        self.pos = m.end()
+        return m.group(0)
+
+    def labels(self):
+        labels = []
+        while True:
+            self.skip_ws(newlines=False)
+            c = self.peek()
+            if c == "{":
+                self.pos += 1
+                return labels
+            if c == '"':
+                try:
+                    labels.append(self.string_literal())
+                except _NotLiteral:
+                    self.error("invalid block label")
+            else:
+                labels.append(self.identifier())
+
+    def body(self):
+        """
+        Parse the block body (after the opening brace), returns the attributes (name -> (value, source text)).
+        The nested blocks are skipped.
+        """
+        attributes = dict()
+        while True:
+            self.skip_ws()
+            if self.eof():
+                self.error("unterminated block")
+            if self.peek() == "}":
+                self.pos += 1
+                return attributes
+            name = self.identifier()
+            self.skip_ws(newlines=False)
+            if self.peek() == "=" and self.peek(2) != "==":
+                self.pos += 1
+                attributes[name] = self.expression()
+            else:
+                self.labels()
+                self.body()
+
+    def expression(self):
+        """
+        Parse the expression of an attribute, returns (value, source text)
+        """
+        self.skip_ws(newlines=False)
+        start = self.pos
+        try:
+            value = self.literal()
+            end = self.pos
+            self.skip_ws(newlines=False)
+            if self.eof() or self.peek() in "\n}":
+                return (value, self.text[start:end])
+        except _NotLiteral:
+            pass
+        # Not a literal value - return the source text of the expression
+        self.pos = start
+        self.skip_expression()
+        return (None, self.text[start:self.pos].strip())
+
+    def skip_expression(self):
+        # Up to the end of the line (or the closing brace of the block), outside the brackets, strings & heredocs
+        depth = 0
+        text = self.text
+        while self.pos < len(text):
+            c = text[self.pos]
+            if c == '"':
+                self.skip_string()
+            elif text.startswith("<<", self.pos) and HeredocPattern.match(text, self.pos):
+                try:
+                    self.heredoc()
+                except _NotLiteral:
+                    # Heredoc template, skipped all the same
+                    pass
+            elif c == "#" or text.startswith("//", self.pos) or text.startswith("/*", self.pos):
+                self.skip_ws(newlines=depth > 0)
+            elif c in "([{":
+                depth += 1
+                self.pos += 1
+            elif c in ")]}":
+                if depth == 0:
+                    return
+                depth -= 1
+                self.pos += 1
+            elif c == "\n" and depth == 0:
+                return
+            else:
+                self.pos += 1
+
+    def skip_string(self):
+        # Quoted string, with the template interpolations (that can include strings)
+        text = self.text
+        self.pos += 1
+        while self.pos < len(text):
+            c = text[self.pos]
+            if c == "\\":
+                self.pos += 2
+            elif c == '"':
+                self.pos += 1
+                return
+            elif (c == "$" or c == "%") and text.startswith("{", self.pos + 1):
+                self.pos += 2
+                self.skip_expression()
+                if self.peek() != "}":
+                    self.error("unterminated template interpolation")
+                self.pos += 1
+            elif c == "\n":
+                self.error("unterminated string")
+            else:
+                self.pos += 1
+        self.error("unterminated string")
+
+    # ===================================
+    # Literal values
+
+    def literal(self):
+        c = self.peek()
+        if c == '"':
+            return self.string_literal()
+        if c == "<" and HeredocPattern.match(self.text, self.pos):
+            return self.heredoc()
+        if c == "[":
+            return self.list_literal()
+        if c == "{":
+            return self.object_literal()
+        m = NumberPattern.match(self.text, self.pos)
+        if m != None:
+            end = m.end()
+            if end < len(self.text) and (self.text[end].isalnum() or self.text[end] in "_."):
+                raise _NotLiteral()
+            self.pos = end
+            num = m.group(0)
+            return float(num) if (m.group(1) != None or m.group(2) != None) else int(num)
+        m = IdentifierPattern.match(self.text, self.pos)
+        if m != None:
+            word = m.group(0)
+            end = m.end()
+            if word in ("true", "false", "null") and not (end < len(self.text) and self.text[end] in ".[("):
+                self.pos = end
+                return None if word == "null" else (word == "true")
+        raise _NotLiteral()
+
+    def string_literal(self):
+        text = self.text
+        start = self.pos
+        self.pos += 1
+        chars = []
+        while self.pos < len(text):
+            c = text[self.pos]
+            if c == '"':
+                self.pos += 1
+                return "".join(chars)
+            if c == "\\":
+                esc = text[self.pos + 1:self.pos + 2]
+                if esc == "n":
+                    chars.append("\n")
+                elif esc == "t":
+                    chars.append("\t")
+                elif esc == "r":
+                    chars.append("\r")
+                elif esc == "u" or esc == "U":
+                    size = 4 if esc == "u" else 8
+                    chars.append(chr(int(text[self.pos + 2:self.pos + 2 + size], 16)))
+                    self.pos += size
+                else:
+                    chars.append(esc)
+                self.pos += 2
+            elif (c == "$" or c == "%") and text.startswith("{", self.pos + 1):
+                # Template (not a literal string)
+                self.pos = start
+                raise _NotLiteral()
+            elif c == "\n":
+                self.error("unterminated string")
+            else:
+                chars.append(c)
+                self.pos += 1
+        self.error("unterminated string")
+
+    def heredoc(self):
+        m = HeredocPattern.match(self.text, self.pos)
+        indent, marker = m.group(1) == "-", m.group(2)
+        lines = []
+        pos = m.end()
+        while True:
+            end = self.text.find("\n", pos)
+            line = self.text[pos:] if end < 0 else self.text[pos:end]
+            if line.strip() == marker:
+                self.pos = pos + len(line)
+                break
+            lines.append(line.rstrip("\r"))
+            if end < 0:
+                self.error("unterminated heredoc " + marker)
+            pos = end + 1
+        if indent:
+            # <<- strips the common leading spaces
+            margins = [len(l) - len(l.lstrip()) for l in lines if l.strip() != ""]
+            margin = min(margins) if len(margins) > 0 else 0
+            lines = [l[margin:] for l in lines]
+        value = "\n".join(lines) + ("\n" if len(lines) > 0 else "")
+        if "${" in value or "%{" in value:
+            raise _NotLiteral()
+        return value
+
+    def list_literal(self):
+        self.pos += 1
+        values = []
+        while True:
+            self.skip_ws()
+            if self.peek() == "]":
+                self.pos += 1
+                return values
+            values.append(self.literal())
+            self.skip_ws()
+            if self.peek() == ",":
+                self.pos += 1
+            elif self.peek() != "]":
+                raise _NotLiteral()
+
+    def object_literal(self):
+        self.pos += 1
+        values = dict()
+        while True:
+            self.skip_ws()
+            if self.peek() == "}":
+                self.pos += 1
+                return values
+            if self.peek() == '"':
+                key = self.string_literal()
+            else:
+                m = IdentifierPattern.match(self.text, self.pos)
+                if m == None:
+                    raise _NotLiteral()
+                key = m.group(0)
+                self.pos = m.end()
+            self.skip_ws(newlines=False)
+            if self.peek() not in ("=", ":") or self.peek(2) == "==":
+                raise _NotLiteral()
+            self.pos += 1
+            self.skip_ws()
+            values[key] = self.literal()
+            self.skip_ws(newlines=False)
+            if self.peek() == ",":
+                self.pos += 1
+
+def _type_text(source):
+    # Type constraint, as written in the source (without the comments, and with the spaces normalized)
+    return re.sub(r'\s+', ' ', _strip_comments(source)).strip()
+
+def _strip_comments(source):
+    """
+    Remove the comments (#, // and /* */) from the source text of an expression, outside the quoted strings
+    """
+    chars = []
+    pos = 0
+    while pos < len(source):
+        c = source[pos]
+        if c == '"':
+            end = pos + 1
+            while end < len(source) and source[end] != '"':
+                end += 2 if source[end] == "\\" else 1
+            chars.append(source[pos:end + 1])
+            pos = end + 1
+        elif c == "#" or source.startswith("//", pos):
+            end = source.find("\n", pos)
+            pos = len(source) if end < 0 else end
+        elif source.startswith("/*", pos):
+            end = source.find("*/", pos + 2)
+            pos = len(source) if end < 0 else end + 2
+            chars.append(" ")
+        else:
+            chars.append(c)
+            pos += 1
+    return "".join(chars)
+
+def scan_tf(text, file_name="main.tf"):
+    """
+    Scan the variable & output blocks of a terraform file (.tf), returns the tuple (variables, outputs)
+    with the same structure as terraform-config-inspect --json
+    """
+    variables = dict()
+    outputs = dict()
+    for (block_type, labels, attributes, line) in _Parser(text, file_name).parse_file():
+        if len(labels) != 1:
+            continue
+        name = labels[0]
+        pos = {"filename": file_name, "line": line}
+        if block_type == "variable":
+            var = {"name": name}
+            if "type" in attributes:
+                var["type"] = _type_text(attributes["type"][1])
+            if "description" in attributes:
+                var["description"] = _text_value(attributes["description"])
+            if "default" in attributes:
+                # Like terraform-config-inspect, the default is null if it is not a literal value
+                var["default"] = attributes["default"][0]
+            var["required"] = "default" not in attributes
+            if "sensitive" in attributes and attributes["sensitive"][0] == True:
+                var["sensitive"] = True
+            var["pos"] = pos
+            variables[name] = var
+        elif block_type == "output":
+            out = {"name": name}
+            if "description" in attributes:
+                out["description"] = _text_value(attributes["description"])
+            if "sensitive" in attributes and attributes["sensitive"][0] == True:
+                out["sensitive"] = True
+            out["pos"] = pos
+            outputs[name] = out
+    return (variables, outputs)
+
+def _text_value(attribute):
+    (value, source) = attribute
+    return value if isinstance(value, str) else source
+
+def scan_tf_json(text, file_name="main.tf.json"):
+    """
+    Scan the variable & output blocks of a terraform json file (.tf.json)
+    """
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError("Error scanning " + str(file_name) + " : " + str(e))
+    variables = dict()
+    outputs = dict()
+    if not isinstance(data, dict):
+        return (variables, outputs)
+    for name, attributes in _json_blocks(data.get("variable")):
+        var = {"name": name}
+        if "type" in attributes:
+            type = str(attributes["type"])
+            if type.startswith("${") and type.endswith("}"):
+                type = type[2:-1]
+            var["type"] = _type_text(type)
+        if "description" in attributes:
+            var["description"] = attributes["description"]
+        if "default" in attributes:
+            var["default"] = attributes["default"]
+        var["required"] = "default" not in attributes
+        var["pos"] = {"filename": file_name, "line": 0}
+        variables[name] = var
+    for name, attributes in _json_blocks(data.get("output")):
+        out = {"name": name}
+        if "description" in attributes:
+            out["description"] = attributes["description"]
+        out["pos"] = {"filename": file_name, "line": 0}
+        outputs[name] = out
+    return (variables, outputs)
+
+def _json_blocks(blocks):
+    # {"name": {...}} or [{"name": {...}}, ...]
+    if isinstance(blocks, dict):
+        blocks = [blocks]
+    if not isinstance(blocks, list):
+        return []
+    result = []
+    for b in blocks:
+        if isinstance(b, dict):
+            for name, attributes in b.items():
+                if isinstance(attributes, list):
+                    attributes = attributes[0] if len(attributes) > 0 else {}
+                result.append((name, attributes if isinstance(attributes, dict) else {}))
+    return result
+
+def scan_file(file_name):
+    """
+    Scan a terraform file (cached, until the file is modified), returns the tuple (variables, outputs)
+    """
+    file_name = os.path.abspath(file_name)
+    st = os.stat(file_name)
+    with _file_cache_lock:
+        cached = _file_cache.get(file_name)
+    if cached != None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return (cached[2], cached[3])
+
+    with open(file_name, encoding="utf-8") as tf_file:
+        text = tf_file.read()
+    base_name = os.path.basename(file_name)
+    if base_name.endswith(".tf.json"):
+        (variables, outputs) = scan_tf_json(text, base_name)
+    else:
+        (variables, outputs) = scan_tf(text, base_name)
+    with _file_cache_lock:
+        _file_cache[file_name] = (st.st_mtime_ns, st.st_size, variables, outputs)
+    return (variables, outputs)
+
+def scan_module(module_dir) -> dict:
+    """
+    Scan the variables & the outputs of the terraform module (the .tf & .tf.json files of the folder).
+    Returns a dict like terraform-config-inspect --json: {"path", "variables", "outputs"}
+    """
+    variables = dict()
+    outputs = dict()
+    file_names = [f for f in sorted(os.listdir(module_dir))
+                    if (f.endswith(".tf") or f.endswith(".tf.json")) and os.path.isfile(os.path.join(module_dir, f))]
+    # The override files are merged by terraform, after the other files
+    file_names = [f for f in file_names if not _is_override(f)] + [f for f in file_names if _is_override(f)]
+    for file_name in file_names:
+        path = os.path.join(module_dir, file_name)
+        (file_variables, file_outputs) = scan_file(path)
+        for name, var in file_variables.items():
+            if name in variables and _is_override(file_name):
+                merged = dict(variables[name])
+                merged.update({k: v for k, v in var.items() if k not in ("name", "pos", "required")})
+                merged["required"] = "default" not in merged
+                variables[name] = merged
+            else:
+                variables[name] = var
+        for name, out in file_outputs.items():
+            if name in outputs and _is_override(file_name):
+                merged = dict(outputs[name])
+                merged.update({k: v for k, v in out.items() if k not in ("name", "pos")})
+                outputs[name] = merged
+            else:
+                outputs[name] = out
+    logr.debug("Scanned " + str(len(variables)) + " variables & " + str(len(outputs)) + " outputs in " + str(module_dir))
+    return {"path": str(module_dir), "variables": variables, "outputs": outputs}
+
+def _is_override(file_name):
+    base = file_name[:-len(".tf.json")] if file_name.endswith(".tf.json") else file_name[:-len(".tf")]
+    return base == "override" or base.endswith("_override")
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import yaml
+
 def val_type(val) -> str:
     if val == None:
         return 'unknown'
@@ -71,4 +74,89 @@ def is_val_type(val, type) -> bool:
             return True
         else:
             return False
-    return False
\ No newline at end of file
+    return False
+
+def _parse_complex(val):
+    # Complex values, written as json or as python / yaml flow style (['a', 'b'], {'k': 'v'})
+    if not val.strip().startswith(('[', '{')):
+        return val
+    try:
+        return json.loads(val)
+    except ValueError:
+        pass
+    try:
+        return yaml.safe_load(val)
+    except yaml.YAMLError:
+        return val
+
+def to_tf_value(val, type=None):
+    """
+    Convert the input value to the json value for the terraform variable type 
+    (string, number, bool, list(..), set(..), tuple(..), map(..), object(..) or any).
+    The value is returned unchanged, if it can not be converted.
+    """
+    if val == None:
+        return None
+    tf_type = str(type).strip().lower() if type != None else ''
+    if tf_type == '':
+        # assume the type is string, for the scalar values
+        if isinstance(val, (list, dict)):
+            return val
+        tf_type = 'string'
+
+    if tf_type == 'string':
+        if isinstance(val, bool):
+            return 'true' if val else 'false'
+        if isinstance(val, (list, dict)):
+            return json.dumps(val)
+        return str(val)
+    if tf_type in ('number', 'integer', 'int', 'float'):
+        if isinstance(val, bool) or not isinstance(val, (str, int, float)):
+            return val
+        if isinstance(val, str):
+            try:
+                return int(val)
+            except ValueError:
+                try:
+                    return float(val)
+                except ValueError:
+                    return val
+        return val
+    if tf_type in ('bool', 'boolean'):
+        if isinstance(val, str) and val.strip().lower() in ('true', 'false'):
+            return val.strip().lower() == 'true'
+        return val
+    if tf_type.startswith(('list', 'set', 'tuple', 'map', 'object', 'any')):
+        if isinstance(val, str) and not (val.startswith('$blueprint') or val.startswith('$module')):
+            return _parse_complex(val)
+        return val
+    return val
+
+def base_type(type) -> str:
+    """
+    Family of the parameter type (string, number, bool, list, map or any), for comparing the types
+    of the wired parameters; for example, 'list(string)' and 'list' are both 'list'.
+    Returns None, if the type is not known.
+    """
+    if type == None:
+        return None
+    tf_type = str(type).strip().lower()
+    if tf_type == '' or tf_type in ('unknown', 'linked'):
+        return None
+    tf_type = tf_type.split('(')[0].strip()
+    if tf_type in ('number', 'integer', 'int', 'float'):
+        return 'number'
+    if tf_type in ('bool', 'boolean'):
+        return 'bool'
+    if tf_type in ('list', 'set', 'tuple'):
+        return 'list'
+    if tf_type in ('map', 'object'):
+        return 'map'
+    return tf_type
+
+def is_compatible_type(type1, type2) -> bool:
+    family1 = base_type(type1)
+    family2 = base_type(type2)
+    if family1 == None or family2 == None or family1 == 'any' or family2 == 'any':
+        return True
+    return family1 == family2
@@ -81,32 +81,57 @@ class BlueprintManifest:
         except KeyError:
             return False
 
-    def _merge(self, obj_arr, yaml_arr):
-        result = []
-        names = []
-        for obj in obj_arr:
-            if(obj.name in names):
-                self.bperrors.append(event.ValidationEvent(event.BPWarning, 'Duplicate parameter name: ' + obj.name))
-            names.append(obj.name)
-            result.append(obj)
-        
-        if isinstance(yaml_arr, dict):
-            entry={}
-            for key, value in yaml_arr.items():
-                if key == "name":
-                    if(value in names):
-                        self.bperrors.append(event.ValidationEvent(event.BPWarning, 'Duplicate parameter name: ' + value))
-                    names.append(value)
-                entry[key]= value
-            result.append(entry)
-        else:
-            for entry in yaml_arr:
-                if(entry['name'] in names):
-                    self.bperrors.append(event.ValidationEvent(event.BPWarning, 'Duplicate parameter name: ' + entry['name']))
-                names.append(entry['name'])
-                result.append(entry)
-    
-        return result
+    def _merge(self, merged, entries, from_yaml, errors):
+        """
+        Merge the entries (yaml data, or parsed objects) into merged (dict of name -> parsed object).
+        Each entry is parsed once; the first definition of a name is kept, and the duplicates are reported.
+        """
+        if not isinstance(entries, list):
+            entries = [entries]
+        for entry in entries:
+            name = entry['name'] if isinstance(entry, dict) else entry.name
+            if name in merged:
+                errors.append(event.ValidationEvent(event.BPWarning, 'Duplicate parameter name: ' + str(name)))
+                continue
+            merged[name] = from_yaml(entry)
+
+    def _load_section(self, bpyaml, section, fragments, obj_type, label, errors):
+        """
+        Load the manifest files & the inline definitions (fragments) of a section (inputs, outputs, settings or modules),
+        and update the section in the blueprint (bpyaml)
+        """
+        merged = dict()
+        if getattr(bpyaml, section, None) != None:
+            self._merge(merged, getattr(bpyaml, section), obj_type.from_yaml, errors)
+
+        for fragment in fragments:
+            if isinstance(fragment, str):
+                m = re.search('\$\{\{(.*?)\}\}', fragment)
+                if m:
+                    fragment_filename = m.group(1)
+                    rel_fragment_filename = os.path.basename(fragment_filename)
+                    rel_fragment_filename = os.path.join(self.manifest_file_location, rel_fragment_filename)
+                    fragment_yaml = bfile.FileHelper.load(rel_fragment_filename)
+                    if not self._hasattr(fragment_yaml, section) or fragment_yaml[section] == None:
+                        errors.append(event.ValidationEvent(event.BPWarning, 'Invalid ' + section + ' yaml stucture, skipping ' + fragment_filename))
+                    else:
+                        self._merge(merged, fragment_yaml[section], obj_type.from_yaml, errors)
+                else :
+                    errors.append(event.ValidationEvent(event.BPError, 'Error parsing the ' + label + ' string: ' + str(fragment)))
+            elif isinstance(fragment, obj_type):
+                if hasattr(fragment, 'name'):
+                    self._merge(merged, fragment, obj_type.from_yaml, errors)
+                else:
+                    errors.append(event.ValidationEvent(event.BPError, 'Invalid ' + label + ' definition'))
+            else :
+                keys = fragment.keys()
+                if 'name' in keys:
+                    self._merge(merged, fragment, obj_type.from_yaml, errors)
+                else:
+                    errors.append(event.ValidationEvent(event.BPError, 'Unknown ' + label + ' section: ' + str(fragment)))
+
+        if len(merged) > 0:
+            setattr(bpyaml, section, list(merged.values()))
 
     @classmethod
     def from_yaml_file(cls, filename):
@@ -194,45 +219,7 @@ class BlueprintManifest:
             self.inputs = []
 
         cwd = os.getcwd()
-        for input in self.inputs:
-            if isinstance(input, str):
-                m = re.search('\$\{\{(.*?)\}\}', input)
-                if m:
-                    input_filename = m.group(1)
-                    rel_input_filename = os.path.basename(input_filename)
-                    rel_input_filename = os.path.join(self.manifest_file_location, rel_input_filename)
-                    input_yaml = bfile.FileHelper.load(rel_input_filename)
-                    if self._hasattr(input_yaml, 'inputs') and input_yaml['inputs'] == None:
-                        errors.append(event.ValidationEvent(event.BPWarning, 'Invalid inputs yaml stucture, skipping ' + input_filename))
-                    else:
-                        if (not hasattr(bpyaml, 'inputs')) or bpyaml.inputs == None:
-                            bpyaml.inputs = param.Input.from_yaml_list(input_yaml['inputs'])
-                        else:
-                            bpyaml_inputs = self._merge(bpyaml.inputs, input_yaml['inputs'])
-                            bpyaml.inputs = param.Input.from_yaml_list(bpyaml_inputs)
-                else :
-                    errors.append(event.ValidationEvent(event.BPError, 'Error parsing the input string: ' + str(input)))
-            elif isinstance(input, param.Input):
-                if hasattr(input, 'name'):
-                    if not self._hasattr(bpyaml, 'inputs') or bpyaml.inputs == None:
-                        bpyaml.inputs = param.Input.from_yaml_list([input])
-                    else:
-                        bpyaml_inputs = self._merge(bpyaml.inputs, input)
-                        bpyaml.inputs = param.Input.from_yaml_list(bpyaml_inputs)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Invalid input definition'))
-            else :
-                keys = input.keys()
-                if 'name' in keys:
-                    tempInput = param.Input.from_yaml(input)
-                    if not self._hasattr(bpyaml, 'inputs') or bpyaml.inputs == None:
-                        bpyaml.inputs = param.Input.from_yaml_list([tempInput])
-                    else:
-                        bpyaml_inputs = self._merge(bpyaml.inputs, tempInput)
-                        bpyaml.inputs = param.Input.from_yaml_list(bpyaml_inputs)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Unknown input section: ' + str(input)))
-        
+        self._load_section(bpyaml, 'inputs', self.inputs, param.Input, 'input', errors)
         os.chdir(cwd)
         return (bpyaml, errors)
 
@@ -247,45 +234,7 @@ class BlueprintManifest:
             self.outputs = []
             
         cwd = os.getcwd()
-        for output in self.outputs:
-            if isinstance(output, str):
-                m = re.search('\$\{\{(.*?)\}\}', output)
-                if m:
-                    output_filename = m.group(1)
-                    rel_output_filename = os.path.basename(output_filename)
-                    rel_output_filename = os.path.join(self.manifest_file_location, rel_output_filename)
-                    output_yaml = bfile.FileHelper.load(rel_output_filename)
-                    if self._hasattr(output_yaml, 'outputs') and output_yaml['outputs'] == None:
-                        errors.append(event.ValidationEvent(event.BPWarning, 'Invalid outputs yaml stucture, skipping ' + output_filename))
-                    else:
-                        if not hasattr(bpyaml, 'outputs') or bpyaml.outputs == None:
-                            bpyaml.outputs = param.Output.from_yaml_list(output_yaml['outputs'])
-                        else:
-                            bpyaml_outputs = self._merge(bpyaml.outputs, output_yaml['outputs'])
-                            bpyaml.outputs = param.Output.from_yaml_list(bpyaml_outputs)
-                else :
-                    errors.append(event.ValidationEvent(event.BPError, 'Error parsing the output string: ' + str(output)))
-            elif isinstance(output, param.Output):
-                if hasattr(output, 'name'):
-                    if not hasattr(bpyaml, 'outputs') or bpyaml.outputs == None:
-                        bpyaml.outputs = param.Output.from_yaml_list([output])
-                    else:
-                        bpyaml_outputs = self._merge(bpyaml.outputs, output)
-                        bpyaml.outputs = param.Output.from_yaml_list(bpyaml_outputs)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Invalid output definition'))
-            else :
-                keys = output.keys()
-                if 'name' in keys:
-                    tempOutput = param.Output.from_yaml(output)
-                    if not self._hasattr(bpyaml, 'outputs') or bpyaml.outputs == None:
-                        bpyaml.outputs = param.Output.from_yaml_list([tempOutput])
-                    else:
-                        bpyaml_outputs = self._merge(bpyaml.outputs, tempOutput)
-                        bpyaml.outputs = param.Output.from_yaml_list(bpyaml_outputs)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Unknown output section: ' + str(output)))
-       
+        self._load_section(bpyaml, 'outputs', self.outputs, param.Output, 'output', errors)
         os.chdir(cwd)
         return (bpyaml, errors)
 
@@ -299,45 +248,7 @@ class BlueprintManifest:
             self.settings = []
 
         cwd = os.getcwd()
-        for setting in self.settings:
-            if isinstance(setting, str):
-                m = re.search('\$\{\{(.*?)\}\}', setting)
-                if m:
-                    setting_filename = m.group(1)
-                    rel_setting_filename = os.path.basename(setting_filename)
-                    rel_setting_filename = os.path.join(self.manifest_file_location, rel_setting_filename)
-                    setting_yaml = bfile.FileHelper.load(rel_setting_filename)
-                    if self._hasattr(setting_yaml, 'settings') and setting_yaml['settings'] == None:
-                        errors.append(event.ValidationEvent(event.BPWarning, 'Invalid settings yaml stucture, skipping ' + setting_filename))
-                    else:
-                        if not hasattr(bpyaml, 'settings') or bpyaml.settings == None:
-                            bpyaml.settings = param.Setting.from_yaml_list(setting_yaml['settings'])
-                        else:
-                            bpyaml_settings = self._merge(bpyaml.settings, setting_yaml['settings'])
-                            bpyaml.settings = param.Setting.from_yaml_list(bpyaml_settings)
-                else :
-                    errors.append(event.ValidationEvent(event.BPError, 'Error parsing the setting string: ' + str(setting)))
-            elif isinstance(setting, param.Input):
-                if hasattr(setting, 'name'):
-                    if not hasattr(bpyaml, 'settings') or bpyaml.settings == None:
-                        bpyaml.settings = param.Setting.from_yaml_list([setting])
-                    else:
-                        bpyaml_settings = self._merge(bpyaml.settings, setting)
-                        bpyaml.settings = param.Setting.from_yaml_list(bpyaml_settings)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Invalid setting definition'))
-            else :
-                keys = setting.keys()
-                if 'name' in keys:
-                    tempSetting = param.Setting.from_yaml(setting)
-                    if not self._hasattr(bpyaml, 'settings') or bpyaml.settings == None:
-                        bpyaml.settings = param.Setting.from_yaml_list([tempSetting])
-                    else:
-                        bpyaml_settings = self._merge(bpyaml.settings, tempSetting)
-                        bpyaml.settings = param.Setting.from_yaml_list(bpyaml_settings)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Unknown setting section: ' + str(setting)))
-        
+        self._load_section(bpyaml, 'settings', self.settings, param.Setting, 'setting', errors)
         os.chdir(cwd)
         return (bpyaml, errors)
 
@@ -349,47 +260,10 @@ class BlueprintManifest:
         errors = []
         if self.modules == None:
             errors.append(event.ValidationEvent(event.BPWarning, 'No modules in the blueprint manifest file'))
+            self.modules = []
 
         cwd = os.getcwd()
-        for mod in self.modules:
-            if isinstance(mod, str):
-                m = re.search('\$\{\{(.*?)\}\}', mod)
-                if m:
-                    mod_filename = m.group(1)
-                    rel_mod_filename = os.path.basename(mod_filename)
-                    rel_mod_filename = os.path.join(self.manifest_file_location, rel_mod_filename)
-                    mod_yaml = bfile.FileHelper.load(rel_mod_filename)
-                    if self._hasattr(mod_yaml, 'modules') and mod_yaml['modules'] == None:
-                        errors.append(event.ValidationEvent(event.BPWarning, 'Invalid modules yaml stucture, skipping ' + mod_filename))
-                    else:
-                        if not hasattr(bpyaml, 'modules') or bpyaml.modules == None:
-                            bpyaml.modules = module.Module.from_yaml_list(mod_yaml['modules'])
-                        else:
-                            bpyaml_modules = self._merge(bpyaml.modules, mod_yaml['modules'])
-                            bpyaml.modules = module.Module.from_yaml_list(bpyaml_modules)
-                else :
-                    errors.append(event.ValidationEvent(event.BPError, 'Error parsing the module string: ' + str(mod)))
-            elif isinstance(mod, module.Module):
-                if hasattr(mod, 'name'):
-                    if not hasattr(bpyaml, 'modules') or bpyaml.modules == None:
-                        bpyaml.modules = module.Module.from_yaml_list([mod])
-                    else:
-                        bpyaml_modules = self._merge(bpyaml.modules, mod)
-                        bpyaml.modules = module.Module.from_yaml_list(bpyaml_modules)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Invalid module definition'))
-            else :
-                keys = mod.keys()
-                if 'name' in keys:
-                    tempMod = module.Module.from_yaml(mod)
-                    if not self._hasattr(bpyaml, 'modules') or bpyaml.modules == None:
-                        bpyaml.modules = module.Module.from_yaml_list([tempMod])
-                    else:
-                        bpyaml_modules = self._merge(bpyaml.modules, tempMod)
-                        bpyaml.modules = module.Module.from_yaml_list(bpyaml_modules)
-                else:
-                    errors.append(event.ValidationEvent(event.BPError, 'Unknown module section: ' + str(mod)))
-        
+        self._load_section(bpyaml, 'modules', self.modules, module.Module, 'module', errors)
         os.chdir(cwd)
         return (bpyaml, errors)
 
@@ -0,0 +1,185 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import asyncio
+from collections import OrderedDict, deque
+
+from blueprint.run import bprunner
+from blueprint.lib import bfile
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+def eprint(*args, **kwargs):
+    logr.error(*args)
+    print(*args, file=sys.stderr, **kwargs)
+
+class FairLimiter:
+
+    def __init__(self, limit):
+        """
+        Concurrency limit shared by the blueprints of a batch.
+        The free slots are given to the waiting blueprints in turn (round-robin),
+        and to the modules of a blueprint in the order of their requests.
+        """
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self.waiters = OrderedDict() # owner -> deque of futures
+
+    async def acquire(self, owner):
+        if self.in_use < self.limit and len(self.waiters) == 0:
+            self.in_use += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(owner, deque()).append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slot was given, before the waiter was cancelled
+                self.release()
+            elif owner in self.waiters and fut in self.waiters[owner]:
+                self.waiters[owner].remove(fut)
+                if len(self.waiters[owner]) == 0:
+                    del self.waiters[owner]
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self._wake_up()
+
+    def _wake_up(self):
+        while self.in_use < self.limit and len(self.waiters) > 0:
+            owner, queue = next(iter(self.waiters.items()))
+            fut = queue.popleft()
+            # the owner goes to the end of the line
+            del self.waiters[owner]
+            if len(queue) > 0:
+                self.waiters[owner] = queue
+            if fut.done():
+                continue
+            self.in_use += 1
+            fut.set_result(True)
+
+class BatchRunner:
+
+    def __init__(self, batch, working_dir = '.', parallelism = 4, blueprint_parallelism = None,
+                    dry_run = False, ignore_validation_errors = False,
+                    plugin_cache_dir = None, git_mirror_dir = None, **runner_args):
+        """
+        Run the same command for a batch of blueprints (for example, one blueprint per tenant), with:
+            - one global concurrency limit for the modules of all the blueprints (fair to every blueprint),
+            - the provider plugin cache and the git mirrors, shared by all the blueprints.
+
+        :param batch: List of (blueprint_file, input_data_file) or (blueprint_file, input_data_file, name);
+                      the blueprint runs in the working_dir/name folder (default name: input_data_file without extension)
+        :param parallelism: Number of modules to run concurrently, across all the blueprints
+        :param blueprint_parallelism: Number of modules to run concurrently, for a blueprint (default: parallelism)
+        :param runner_args: Other arguments for the BlueprintRunner of every blueprint
+        """
+        self.working_dir = os.path.abspath(working_dir)
+        self.parallelism = max(1, parallelism)
+        self.blueprint_parallelism = blueprint_parallelism if blueprint_parallelism != None else self.parallelism
+        if plugin_cache_dir == None:
+            plugin_cache_dir = os.path.join(self.working_dir, ".terraform.d", "plugin-cache")
+        if git_mirror_dir == None:
+            git_mirror_dir = os.path.join(self.working_dir, ".git-mirror")
+        self.plugin_cache_dir = os.path.abspath(plugin_cache_dir)
+        self.git_mirror_dir = os.path.abspath(git_mirror_dir)
+
+        self.blueprint_runners = OrderedDict() # name -> BlueprintRunner
+        cwd = os.getcwd()
+        try:
+            for entry in batch:
+                if len(entry) < 2 or len(entry) > 3:
+                    raise ValueError("Invalid batch entry, expected (blueprint_file, input_data_file [, name]) : " + str(entry))
+                blueprint_file = os.path.abspath(entry[0])
+                input_data_file = os.path.abspath(entry[1])
+                name = entry[2] if len(entry) == 3 else os.path.splitext(os.path.basename(input_data_file))[0]
+                if name in self.blueprint_runners:
+                    raise ValueError("Duplicate name in the batch : " + str(name))
+
+                logr.info("Loading blueprint " + blueprint_file + " with input " + input_data_file + " as " + name)
+                # BlueprintRunner changes the current directory to its working_dir
+                self.blueprint_runners[name] = bprunner.BlueprintRunner(blueprint_file, input_data_file,
+                                                    dry_run = dry_run,
+                                                    ignore_validation_errors = ignore_validation_errors,
+                                                    working_dir = os.path.join(self.working_dir, name),
+                                                    parallelism = self.blueprint_parallelism,
+                                                    plugin_cache_dir = self.plugin_cache_dir,
+                                                    git_mirror_dir = self.git_mirror_dir,
+                                                    name = name,
+                                                    **runner_args)
+                os.chdir(cwd)
+        finally:
+            os.chdir(cwd)
+
+    def run(self, command):
+        """
+        Run the terraform command (init, plan, apply or destroy) for all the blueprints in the batch.
+        Returns the errors of each blueprint (name -> list of errors)
+        """
+        return asyncio.run(self.run_async(command))
+
+    async def run_async(self, command):
+        # asyncio primitives are created in the running event loop
+        limiter = FairLimiter(self.parallelism)
+        # One lock per plugin cache: the blueprints using the same cache do not write to it concurrently
+        init_locks = dict()
+        for br in self.blueprint_runners.values():
+            br.limiter = limiter
+            br.shared_init_locks = init_locks
+
+        names = list(self.blueprint_runners.keys())
+        results = await asyncio.gather(*[self.blueprint_runners[name].run_modules_async(command) for name in names],
+                                        return_exceptions=True)
+        errors = OrderedDict()
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                eprint("Error running terraform " + command + " for the blueprint " + name + " : " + str(result))
+                errors[name] = [result]
+            else:
+                errors[name] = result
+        return errors
+
+    def plugin_cache_summary(self) -> str:
+        hits = sum(br.plugin_cache_stats["hits"] for br in self.blueprint_runners.values())
+        misses = sum(br.plugin_cache_stats["misses"] for br in self.blueprint_runners.values())
+        total = hits + misses
+        hit_rate = 0 if total == 0 else round(100.0 * hits / total, 1)
+        return f'Provider plugin cache ({self.plugin_cache_dir}) - hits: {hits}, downloads: {misses}, hit rate: {hit_rate}%'
+
+def load_batch_file(batch_file):
+    """
+    Load the batch file (yaml or json): a list of {blueprint: <file>, input: <file>, name: <optional name>}.
+    The relative file names are relative to the batch file.
+    """
+    entries = bfile.FileHelper.load(batch_file)
+    if not isinstance(entries, list):
+        raise ValueError("Invalid batch file, expected a list of {blueprint, input, name} : " + str(batch_file))
+    base_dir = os.path.dirname(os.path.abspath(batch_file))
+    batch = []
+    for entry in entries:
+        if not isinstance(entry, dict) or "blueprint" not in entry or "input" not in entry:
+            raise ValueError("Invalid batch entry, expected {blueprint, input, name} : " + str(entry))
+        bp_file = os.path.join(base_dir, entry["blueprint"])
+        input_file = os.path.join(base_dir, entry["input"])
+        if "name" in entry:
+            batch.append((bp_file, input_file, str(entry["name"])))
+        else:
+            batch.append((bp_file, input_file))
+    return batch
@@ -15,31 +15,73 @@
 import os
 import sys
 import yaml
+import time
+import asyncio
+import concurrent.futures
 from blueprint.run import modrunner
+from blueprint.run import outstore
+from blueprint.run import journal
+from blueprint.lib import aioterraform
 
 from blueprint.schema import blueprint
 from blueprint.lib import event
 from blueprint.lib import bfile
 
+import copy
 import shutil
 
 from blueprint.lib.logger import logr
 # import logging
 # logr = logging.getLogger(__name__)
 
+# Number of threads generating the mock templates of the modules, for a dry run
+MockTemplateWorkers = 8
+
 def eprint(*args, **kwargs):
     logr.error(*args)
     print(*args, file=sys.stderr, **kwargs)
 
+def has_errors(errors):
+    # Returns true, if the module run reported any BPError
+    return any(err.level == event.BPError for err in errors if isinstance(err, event.ValidationEvent))
+
 class BlueprintRunner:
 
-    def __init__(self, blueprint_file, input_data_file, dry_run = False, ignore_validation_errors = False, working_dir = '.'):
+    def __init__(self, blueprint_file, input_data_file, dry_run = False, ignore_validation_errors = False, working_dir = '.',
+                    parallelism = 1, timeout = None, force_init = False, plugin_cache_dir = None, force_apply = False,
+                    targets = None, with_dependents = False, with_dependencies = False, resume = False,
+                    tail_lines = aioterraform.DefaultTailLines, json_output = False, quiet = False,
+                    retries = 2, retry_delay = aioterraform.DefaultRetryDelay,
+                    git_mirror_dir = None, name = None, limiter = None, init_locks = None, fake_engine = None):
         self.bp =  blueprint.Blueprint("Temp")
         self.blueprint_file = blueprint_file
         self.input_data_file = input_data_file
         self.working_dir = working_dir
         self.dry_run = dry_run
         self.ignore_validation_errors = ignore_validation_errors
+        self.parallelism = parallelism
+        self.timeout = timeout
+        self.force_init = force_init
+        self.force_apply = force_apply
+        self.targets = targets
+        self.with_dependents = with_dependents
+        self.with_dependencies = with_dependencies
+        self.resume = resume
+        self.tail_lines = tail_lines
+        self.json_output = json_output
+        self.quiet = quiet
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.git_mirror_dir = os.path.abspath(git_mirror_dir) if git_mirror_dir != None else None
+        # Simulate the terraform commands, without terraform (see faketerraform.FakeTerraformEngine)
+        self.fake_engine = fake_engine
+        # Shared by the blueprints of a batch (see batchrunner.BatchRunner)
+        self.name = name
+        self.limiter = limiter
+        # Locks of the provider plugin caches (plugin cache dir -> asyncio.Lock)
+        self.shared_init_locks = init_locks
+        self.init_locks = dict()
+        self.plugin_cache_stats = {"hits": 0, "misses": 0}
 
         self.module_runners = dict()
         self.input_data = dict()
@@ -58,6 +100,20 @@ class BlueprintRunner:
         # else:
         #     shutil.rmtree(working_dir)
         #     os.makedirs(working_dir)
+
+        # Provider plugins are downloaded once, into a cache shared by all the modules
+        if plugin_cache_dir == None:
+            plugin_cache_dir = os.getenv("TF_PLUGIN_CACHE_DIR")
+        if plugin_cache_dir == None:
+            plugin_cache_dir = os.path.join(working_dir, ".terraform.d", "plugin-cache")
+        self.plugin_cache_dir = os.path.abspath(plugin_cache_dir)
+        os.makedirs(self.plugin_cache_dir, exist_ok=True)
+        # Outputs (& the fingerprint of the inputs) of the last successful apply of each module
+        self.output_store = outstore.OutputStore(working_dir)
+        # Append-only journal of the runs, to resume a run after a crash
+        self.journal = journal.RunJournal(working_dir)
+        # Rotating log files, with the terraform output of each module
+        self.log_dir = os.path.join(os.path.abspath(working_dir), outstore.StateFolder, "logs")
         # copy the blueprint.yaml & input file to the working_dir
         blueprint_file_name = blueprint_file[len(os.path.dirname(blueprint_file))+1:]
         input_data_file_name = input_data_file[len(os.path.dirname(input_data_file))+1:]
@@ -89,6 +145,14 @@ class BlueprintRunner:
         if len(e) > 0:
             logr.error("Errors found while loading input data for the blueprint: " + str(e))
         
+        # The module references are resolved again by every run (the saved outputs are loaded, as the modules are scheduled)
+        self.save_module_refs()
+
+        if self.targets != None and len(self.targets) > 0:
+            # Fail early, for an invalid target module name
+            selected = self.bp.dag_select_modules(self.bp.build_dag(), self.targets, self.with_dependents, self.with_dependencies)
+            logr.info("Target modules: " + str(selected))
+
         logr.debug("Loading ModuleRunners for the blueprint")
         e = self.load_module_runners(dry_run, ignore_validation_errors)
         if len(e) > 0:
@@ -128,12 +192,71 @@ class BlueprintRunner:
         self.bp.propagate_blueprint_input_data()
         return errors
 
+    def save_module_refs(self):
+        """
+        Save the unresolved values ($module..., $blueprint... references) of the module inputs & settings, and of the blueprint outputs.
+        Every run starts from these references, so that the DAG is built from the references, and the values of a run
+        (or the saved outputs) are not frozen into the modules.
+        """
+        self.module_refs = dict()
+        for mod in (self.bp.modules if self.bp.modules != None else []):
+            inputs = {p.name: copy.deepcopy(p.value) for p in (mod.inputs if mod.inputs != None and mod.inputs != "" else [])}
+            settings = {p.name: copy.deepcopy(p.value) for p in (mod.settings if mod.settings != None and mod.settings != "" else [])}
+            self.module_refs[mod.name] = (inputs, settings)
+        self.output_refs = {p.name: copy.deepcopy(p.value) for p in (self.bp.outputs if self.bp.outputs != None else [])}
+        self.input_module_data = dict(self.module_data)
+
+    def reset_module_refs(self):
+        """
+        Restore the references saved by save_module_refs, and the module_data to the blueprint input data
+        """
+        for mod in (self.bp.modules if self.bp.modules != None else []):
+            (inputs, settings) = self.module_refs.get(mod.name, (dict(), dict()))
+            for p in (mod.inputs if mod.inputs != None and mod.inputs != "" else []):
+                if p.name in inputs:
+                    p.value = copy.deepcopy(inputs[p.name])
+            for p in (mod.settings if mod.settings != None and mod.settings != "" else []):
+                if p.name in settings:
+                    p.value = copy.deepcopy(settings[p.name])
+        for p in (self.bp.outputs if self.bp.outputs != None else []):
+            if p.name in self.output_refs:
+                p.value = copy.deepcopy(self.output_refs[p.name])
+        self.module_data = dict(self.input_module_data)
+        self.bp.propagate_module_data(self.module_data)
+
+    def load_dependency_outputs(self, mod_name, dependency_graph, loaded):
+        """
+        Load the saved outputs of the modules that mod_name depends on, if they are not applied (or loaded) by this run:
+        for example, the modules planned (not applied), or not yet destroyed.
+        loaded is the set of the modules, whose outputs are in the module_data
+        """
+        for dep_name in dependency_graph.dag.get(mod_name, []):
+            if dep_name in loaded or dep_name not in self.module_runners:
+                continue
+            loaded.add(dep_name)
+            version = self.output_store.get_version(dep_name)
+            if version == 0:
+                logr.debug("No saved outputs for the module " + str(dep_name) + ", used by " + str(mod_name))
+                continue
+            logr.info("Using the saved outputs (version " + str(version) + ") of the module " + str(dep_name) + ", for " + str(mod_name))
+            self.save_module_output_data(self.output_store.get_outputs(dep_name))
+
     def load_module_runners(self, dry_run=False, ignore_validation_errors=False):
         errors = []
-        for mod in self.bp.modules:
-            logr.debug("Loading module-runner for module : " + mod.name)
-            self.module_runners[mod.name] = modrunner.ModuleRunner(self, mod, dry_run, ignore_validation_errors)
-            errors.append(self.module_runners[mod.name].get_errors())
+        if dry_run:
+            # The mock templates of the modules are generated concurrently (disk bound, for large blueprints)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=MockTemplateWorkers) as executor:
+                futures = [(mod, executor.submit(modrunner.ModuleRunner, self, mod, dry_run, ignore_validation_errors))
+                            for mod in self.bp.modules]
+                for mod, future in futures:
+                    logr.debug("Loading module-runner for module : " + mod.name)
+                    self.module_runners[mod.name] = future.result()
+                    errors.append(self.module_runners[mod.name].get_errors())
+        else:
+            for mod in self.bp.modules:
+                logr.debug("Loading module-runner for module : " + mod.name)
+                self.module_runners[mod.name] = modrunner.ModuleRunner(self, mod, dry_run, ignore_validation_errors)
+                errors.append(self.module_runners[mod.name].get_errors())
         logr.debug("Successful load all module-runners")
         
         if len(errors) > 0:
@@ -142,89 +265,293 @@ class BlueprintRunner:
         return errors
 
     def init_modules(self):
-        errors = []
-        # print(self.bp.modules)
-        bp_graph = self.bp.build_dag()
-        while not self.bp.is_dag_empty(bp_graph):
-            mod_name = self.bp.dag_next_node(bp_graph)
-            if mod_name == None:
-                break
+        return self.run_modules("init")
 
-            mr = self.module_runners[mod_name]
-            e = mr.init_module()
-            self.bp.propagate_module_data(self.module_data)
+    def plan_modules(self):
+        return self.run_modules("plan")
 
-            bp_graph.popNode(mod_name)
-            errors.append(e)
+    def apply_modules(self):
+        return self.run_modules("apply")
 
-        if len(errors) > 0:
-            logr.debug("Errors found during init modules.  Count = " + str(len(errors)))
+    def destroy_modules(self):
+        return self.run_modules("destroy")
 
-        return errors
+    def run_modules(self, command):
+        """
+        Run the terraform command (init, plan, apply or destroy) for all the modules in the blueprint,
+        in the order of the dependencies.  Independent modules are run concurrently (upto self.parallelism)
+        """
+        errors = asyncio.run(self.run_modules_async(command))
 
-    def plan_modules(self):
-        errors = []
-        # print(self.bp.modules)
-        bp_graph = self.bp.build_dag()
-        while not self.bp.is_dag_empty(bp_graph):
-            mod_name = self.bp.dag_next_node(bp_graph)
-            if mod_name == None:
-                break
-
-            mr = self.module_runners[mod_name]
-            e = mr.plan_module()
-            self.bp.propagate_module_data(self.module_data)
-
-            bp_graph.popNode(mod_name)
-            errors.append(e)
-        
         if len(errors) > 0:
-            logr.debug("Errors found during plan modules.  Count = " + str(len(errors)))
-        
+            logr.debug("Errors found during " + command + " modules.  Count = " + str(len(errors)))
+
         return errors
 
-    def apply_modules(self):
+    async def run_modules_async(self, command):
         errors = []
-        # print(self.bp.modules)
-        bp_graph = self.bp.build_dag()
-        while not self.bp.is_dag_empty(bp_graph):
-            mod_name = self.bp.dag_next_node(bp_graph)
-            if mod_name == None:
-                break
-
-            mr = self.module_runners[mod_name]
-            e = mr.apply_module()
-            self.bp.propagate_module_data(self.module_data)
-
-            bp_graph.popNode(mod_name)
-            errors.append(e)
-        
-        if len(errors) > 0:
-            logr.debug("Errors found during apply modules.  Count = " + str(len(errors)))
-
+        # asyncio primitives are created in the running event loop
+        self.init_locks = dict()
+        running = dict() # asyncio.Task -> mod_name
+        started = set()
+        loaded = set() # modules, whose outputs are in the module_data
+        self.reset_module_refs()
+
+        if command == "destroy":
+            # Destroy the consumers before the producers (reverse of the dependencies)
+            bp_graph = self.bp.build_destroy_dag()
+        else:
+            bp_graph = self.bp.build_dag()
+        dependency_graph = self.bp.build_dag()
+        selected = self.select_modules(dependency_graph)
+        # Run the modules on the critical path first (longest remaining path, with the durations of the earlier runs)
+        schedule = self.estimate_schedule(command, bp_graph)
+        self.print_schedule_summary(command, schedule)
+        start_time = time.time()
+        failed = []
+        blocked = dict() # mod_name -> failed module, that it depends on
+        if self.resume:
+            completed = self.journal.resume_run(command)
+        else:
+            completed = dict()
+            self.journal.start_run(command)
+        try:
+            while not self.bp.is_dag_empty(bp_graph):
+                untouched = []
+                ready = []
+                for mod_name in self.bp.dag_ready_nodes(bp_graph):
+                    if mod_name not in started:
+                        if mod_name in completed and not self.is_journal_current(mod_name, completed[mod_name], command, dependency_graph, loaded):
+                            del completed[mod_name]
+                        if mod_name in blocked or mod_name in completed or (selected != None and mod_name not in selected):
+                            started.add(mod_name)
+                            untouched.append(mod_name)
+                        else:
+                            ready.append(mod_name)
+                if len(untouched) > 0:
+                    # Modules depending on a failed module, completed earlier in the resumed run, 
+                    # or outside the targeted subgraph are not run
+                    for mod_name in untouched:
+                        if mod_name in blocked:
+                            print("Did not run terraform " + command + " : " + str(mod_name) + ", since the module " + blocked[mod_name] + " failed")
+                            errors.append([event.ValidationEvent(event.BPError, "Did not run " + command + ", since the module " + blocked[mod_name] + " failed", mod_name)])
+                        elif mod_name in completed:
+                            errors.append(self.load_journal_data(mod_name, completed[mod_name]))
+                            loaded.add(mod_name)
+                        else:
+                            errors.append(self.load_saved_outputs(mod_name))
+                            loaded.add(mod_name)
+                        bp_graph.popNode(mod_name)
+                    self.bp.propagate_module_data(self.module_data)
+                    continue
+                ready.sort(key=lambda m: -schedule["remaining"].get(m, 0))
+                scheduled = ready[:max(0, max(1, self.parallelism) - len(running))]
+                for mod_name in scheduled:
+                    self.load_dependency_outputs(mod_name, dependency_graph, loaded)
+                if len(scheduled) > 0:
+                    self.bp.propagate_module_data(self.module_data)
+                for mod_name in scheduled:
+                    started.add(mod_name)
+                    task = asyncio.create_task(self._run_module(mod_name, command))
+                    running[task] = mod_name
+                if len(running) == 0:
+                    break
+
+                done, pending = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    mod_name = running.pop(task)
+                    e = task.result()
+                    if command == "apply" and not has_errors(e):
+                        loaded.add(mod_name)
+                    self.bp.propagate_module_data(self.module_data)
+
+                    if command == "destroy" and has_errors(e):
+                        # The modules used by the failed module must not be destroyed
+                        failed.append(mod_name)
+                    else:
+                        bp_graph.popNode(mod_name)
+                    if command in ("plan", "apply") and has_errors(e):
+                        # Skip only the dependents of the failed module, the independent modules continue
+                        for dependent in dependency_graph.getDependents(mod_name, ("root", "blueprint")):
+                            if dependent not in blocked:
+                                blocked[dependent] = mod_name
+                    errors.append(e)
+            if command == "destroy":
+                for mod_name in bp_graph.nodes:
+                    if mod_name not in failed and mod_name in self.module_runners:
+                        print("Did not run terraform destroy : " + str(mod_name))
+                        errors.append([event.ValidationEvent(event.BPError, "Did not run destroy, since the modules depending on it were not destroyed", mod_name)])
+        finally:
+            for task in running.keys():
+                task.cancel()
+            if len(running) > 0:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+            for mr in self.module_runners.values():
+                mr.close_log()
+
+        run_time = "Run time: " + str(round(time.time() - start_time, 1)) + "s"
+        if len(schedule["history"]) > 0:
+            run_time += " (estimated: " + str(round(schedule["eta"], 1)) + "s)"
+        print(run_time)
+        logr.info("terraform " + command + " " + run_time)
         return errors
 
-    def destroy_modules(self):
+    def estimate_schedule(self, command, bp_graph=None):
+        """
+        Critical path analysis of the modules for the command, with the durations of the earlier runs (in the run journal).
+        Returns the dict from BlueprintGraph.getCriticalPath, with the estimated durations and the estimated completion time (eta)
+        """
+        if bp_graph == None:
+            bp_graph = self.bp.build_destroy_dag() if command == "destroy" else self.bp.build_dag()
+        pseudo_nodes = ("root", "blueprint")
+        durations = self.journal.module_durations(command)
+        # Modules without history: the average duration of the other modules
+        known = [durations[m] for m in durations if m in self.module_runners]
+        default_duration = sum(known) / len(known) if len(known) > 0 else 0
+        for n in pseudo_nodes:
+            durations[n] = 0
+        schedule = bp_graph.getCriticalPath(durations, default_duration)
+        schedule["critical_path"] = [n for n in schedule["critical_path"] if n not in pseudo_nodes]
+        schedule["durations"] = {m: durations.get(m, default_duration) for m in self.module_runners}
+        schedule["history"] = [m for m in self.module_runners if m in durations]
+        schedule["eta"] = bp_graph.estimateMakespan(durations, self.parallelism, default_duration, pseudo_nodes)
+        return schedule
+
+    def print_schedule_summary(self, command, schedule):
+        if len(schedule["history"]) == 0:
+            return
+        critical_path = " -> ".join([m + " (" + str(round(schedule["durations"][m], 1)) + "s)" for m in schedule["critical_path"]])
+        print("Estimated run time: " + str(round(schedule["eta"], 1)) + "s, critical path: " + critical_path)
+        logr.info("terraform " + command + " estimated run time: " + str(round(schedule["eta"], 1)) + "s, critical path: " + critical_path)
+
+    def explain_schedule(self, command) -> str:
+        """
+        Explain the schedule of the modules for the command: the estimated duration, start time & slack of every module,
+        the critical path and the estimated completion time
+        """
+        schedule = self.estimate_schedule(command)
+        lines = []
+        lines.append("Schedule for terraform " + command + " (parallelism " + str(self.parallelism) + ")")
+        lines.append(f'{"Module":<30} {"Duration":>10} {"Start":>10} {"Slack":>10}  {"Critical":<8}')
+        order = sorted(self.module_runners.keys(), key=lambda m: (schedule["earliest_start"].get(m, 0), -schedule["remaining"].get(m, 0)))
+        for m in order:
+            duration = str(round(schedule["durations"][m], 1)) + "s" + ("" if m in schedule["history"] else "*")
+            start = str(round(schedule["earliest_start"].get(m, 0), 1)) + "s"
+            slack = str(round(schedule["slack"].get(m, 0), 1)) + "s"
+            critical = "yes" if abs(schedule["slack"].get(m, 0)) < 1e-6 else ""
+            lines.append(f'{m:<30} {duration:>10} {start:>10} {slack:>10}  {critical:<8}')
+        lines.append("Critical path: " + " -> ".join(schedule["critical_path"]))
+        lines.append("Critical path length: " + str(round(schedule["length"], 1)) + "s")
+        lines.append("Estimated completion time: " + str(round(schedule["eta"], 1)) + "s")
+        if len(schedule["history"]) < len(self.module_runners):
+            lines.append("* no earlier run of the module, estimated with the average duration of the other modules")
+        return "\n".join(lines)
+
+    def select_modules(self, bp_graph):
+        """
+        Returns the modules to be run (the targets, with their dependents and/or dependencies), or None to run all the modules
+        """
+        if self.targets == None or len(self.targets) == 0:
+            return None
+        return self.bp.dag_select_modules(bp_graph, self.targets, self.with_dependents, self.with_dependencies)
+
+    def load_saved_outputs(self, mod_name):
         errors = []
-        # print(self.bp.modules)
-        bp_graph = self.bp.build_dag()
-        while not self.bp.is_dag_empty(bp_graph):
-            mod_name = self.bp.dag_next_node(bp_graph)
-            if mod_name == None:
-                break
-
-            mr = self.module_runners[mod_name]
-            e = mr.destroy_module()
-            self.bp.propagate_module_data(self.module_data)
-
-            bp_graph.popNode(mod_name)
-            errors.append(e)
-        
-        if len(errors) > 0:
-            logr.debug("Errors found during destroy modules.  Count = " + str(len(errors)))
-
+        version = self.output_store.get_version(mod_name)
+        if version == 0:
+            errors.append(event.ValidationEvent(event.BPWarning, "Module is not targeted, and its outputs have not been saved by an earlier apply", mod_name))
+            logr.warning("No saved outputs for the module " + str(mod_name))
+            return errors
+        print("Using the saved outputs (version " + str(version) + ") of the module (not targeted) : " + str(mod_name))
+        self.save_module_output_data(self.output_store.get_outputs(mod_name))
         return errors
 
+    def is_journal_current(self, mod_name, record, command, dependency_graph, loaded) -> bool:
+        """
+        A module completed earlier in the resumed run is skipped, only if its apply fingerprint (inputs, settings & source),
+        with the current values of its inputs, is the fingerprint recorded in the journal
+        """
+        if command == "destroy":
+            return True
+        self.load_dependency_outputs(mod_name, dependency_graph, loaded)
+        self.bp.propagate_module_data(self.module_data)
+        current_fingerprint = self.module_runners[mod_name].current_apply_fingerprint()
+        if record.get("fingerprint") != None and record.get("fingerprint") == current_fingerprint:
+            return True
+        print("Running the module again, changed since it completed in the resumed run : " + str(mod_name))
+        logr.info("Module " + str(mod_name) + " changed since it completed in the resumed run, running terraform " + command + " again")
+        return False
+
+    def load_journal_data(self, mod_name, record):
+        print("Skipping the module, completed earlier in the resumed run : " + str(mod_name))
+        self.save_module_input_data(record.get("inputs"))
+        self.save_module_output_data(record.get("outputs"))
+        return []
+
+    async def _run_module(self, mod_name, command):
+        if self.limiter == None:
+            return await self._run_module_command(mod_name, command)
+        # Global concurrency limit, shared by the blueprints of a batch
+        await self.limiter.acquire(self.name)
+        try:
+            return await self._run_module_command(mod_name, command)
+        finally:
+            self.limiter.release()
+
+    async def _run_module_command(self, mod_name, command):
+        mr = self.module_runners[mod_name]
+        start_time = time.time()
+        self.journal.module_started(mod_name)
+        try:
+            if command == "init":
+                e = await mr.init_module_async()
+            elif command == "plan":
+                e = await mr.plan_module_async()
+            elif command == "apply":
+                e = await mr.apply_module_async()
+            elif command == "destroy":
+                e = await mr.destroy_module_async()
+            else:
+                raise ValueError("Invalid command name: " + str(command))
+        except OSError as ex:
+            # Report the failure of the module, without stopping the other modules
+            eprint("Error running terraform " + command + " for the module " + str(mod_name) + " : " + str(ex))
+            e = [event.ValidationEvent(event.BPError, "Error running terraform " + command + ": " + str(ex), mod_name)]
+
+        # The fingerprint of the inputs, settings & source is checked, when the run is resumed
+        if command == "apply":
+            run_fingerprint = mr.apply_fingerprint
+        elif command != "destroy" and not has_errors(e):
+            run_fingerprint = mr.current_apply_fingerprint()
+        else:
+            run_fingerprint = None
+        self.journal.module_completed(mod_name, journal.Failed if has_errors(e) else journal.Success, start_time,
+                                        fingerprint = run_fingerprint,
+                                        inputs = mr.input_data,
+                                        outputs = mr.output_data,
+                                        skipped = not mr.terraform_ran)
+        return e
+
+    def plugin_cache_lock(self):
+        """
+        Lock of the provider plugin cache of the blueprint, shared with the blueprints (of a batch) using the same cache
+        """
+        init_locks = self.shared_init_locks if self.shared_init_locks != None else self.init_locks
+        if self.plugin_cache_dir not in init_locks:
+            init_locks[self.plugin_cache_dir] = asyncio.Lock()
+        return init_locks[self.plugin_cache_dir]
+
+    def save_plugin_cache_stats(self, hits, misses):
+        self.plugin_cache_stats["hits"] += hits
+        self.plugin_cache_stats["misses"] += misses
+
+    def plugin_cache_summary(self) -> str:
+        hits = self.plugin_cache_stats["hits"]
+        misses = self.plugin_cache_stats["misses"]
+        total = hits + misses
+        hit_rate = 0 if total == 0 else round(100.0 * hits / total, 1)
+        return f'Provider plugin cache ({self.plugin_cache_dir}) - hits: {hits}, downloads: {misses}, hit rate: {hit_rate}%'
+
     def save_module_output_data(self, output_data):
         # output_data -> dict
         # self.module_data -> dict
@@ -0,0 +1,138 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import uuid
+
+from blueprint.run import outstore
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+JournalFile = "journal.jsonl"
+
+# Status of the module records
+Started     = "started"
+Success     = "success"
+Failed      = "failed"
+
+class RunJournal:
+
+    def __init__(self, working_dir):
+        """
+        Append-only journal of the blueprint runs (one json record per line).
+        Every record is flushed & fsync'd, so that the journal survives a crash of the runner.
+
+        :param working_dir: Blueprint working_dir; the journal is saved in the working_dir/.blueprint folder
+        """
+        self.state_dir = os.path.join(os.path.abspath(working_dir), outstore.StateFolder)
+        self.journal_file = os.path.join(self.state_dir, JournalFile)
+        self.run_id = None
+        self.command = None
+
+    def append(self, record):
+        os.makedirs(self.state_dir, exist_ok=True)
+        line = json.dumps(record, sort_keys=True, default=str)
+        with open(self.journal_file, "a") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self):
+        """
+        Read all the records in the journal.  A partial record (the runner crashed while writing it) is ignored.
+        """
+        records = []
+        if not os.path.exists(self.journal_file):
+            return records
+        with open(self.journal_file) as f:
+            for line in f:
+                line = line.strip()
+                if line == "":
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logr.warning("Ignoring partial record in the run journal " + self.journal_file)
+        return records
+
+    def start_run(self, command):
+        self.run_id = uuid.uuid4().hex
+        self.command = command
+        self.append({"event": "run", "run_id": self.run_id, "command": command, "time": time.time()})
+        return self.run_id
+
+    def resume_run(self, command):
+        """
+        Continue the last run of the command.  Returns the records of the modules completed in that run (module name -> record),
+        or an empty dict (and starts a new run), if there is no run to resume.
+        """
+        records = self.read()
+        last_run_id = None
+        for record in records:
+            if record.get("event") == "run" and record.get("command") == command:
+                last_run_id = record.get("run_id")
+        if last_run_id == None:
+            logr.info("No earlier " + command + " run in the journal, starting a new run")
+            self.start_run(command)
+            return {}
+
+        completed = dict()
+        for record in records:
+            if record.get("run_id") != last_run_id or record.get("event") != "module":
+                continue
+            if record.get("status") == Success:
+                completed[record["module"]] = record
+            elif record["module"] in completed:
+                # the module was run again (and did not complete)
+                del completed[record["module"]]
+
+        self.run_id = last_run_id
+        self.command = command
+        self.append({"event": "resume", "run_id": self.run_id, "command": command, "time": time.time()})
+        return completed
+
+    def module_started(self, mod_name):
+        self.append({"event": "module", "run_id": self.run_id, "phase": self.command, "module": mod_name, 
+                     "status": Started, "time": time.time()})
+
+    def module_completed(self, mod_name, status, start_time, fingerprint=None, inputs=None, outputs=None, skipped=False):
+        """
+        Record the completion of the module; skipped is set, if no terraform command was run (init or apply not needed)
+        """
+        end_time = time.time()
+        self.append({"event": "module", "run_id": self.run_id, "phase": self.command, "module": mod_name, 
+                     "status": status, "skipped": skipped, "fingerprint": fingerprint, 
+                     "inputs": inputs if inputs != None else {}, 
+                     "outputs": outputs if outputs != None else {},
+                     "start": start_time, "time": end_time, "duration": round(end_time - start_time, 3)})
+
+    def module_durations(self, command, history=5):
+        """
+        Estimated duration (seconds) of each module for the command: 
+        the average of the last successful runs (upto history) in the journal, without the runs where terraform was skipped
+        """
+        samples = dict()
+        for record in self.read():
+            if record.get("event") == "module" and record.get("phase") == command and record.get("status") == Success:
+                if "duration" in record and not record.get("skipped", False):
+                    samples.setdefault(record["module"], []).append(record["duration"])
+        durations = dict()
+        for mod_name in samples:
+            last = samples[mod_name][-history:]
+            durations[mod_name] = sum(last) / len(last)
+        return durations
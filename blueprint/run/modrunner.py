@@ -14,15 +14,24 @@
 
 import os
 import sys
+import json
+import asyncio
 from blueprint.lib import git
 from blueprint.lib import mock
-from blueprint.lib import terraform
+from blueprint.lib import aioterraform
+from blueprint.lib import fingerprint
 from blueprint.lib import event
+from blueprint.lib import type_helper
 
 from blueprint.lib.logger import logr
+from blueprint.lib.logger import module_logger
+from blueprint.lib.logger import close_module_logger
 # import logging
 # logr = logging.getLogger(__name__)
 
+# Input values of the module (terraform json variable definitions file)
+TfvarsFile = "blueprint.tfvars.json"
+
 def eprint(*args, **kwargs):
     logr.error(*args)
     print(*args, file=sys.stderr, **kwargs)
@@ -32,6 +41,14 @@ class ModuleRunner:
     def __init__(self, parent, module, dry_run=False, ignore_validation_errors = False):
         self.parent = parent
         self.errors = []
+        self.env = None
+        # Data of the last run of the module (recorded in the run journal)
+        self.input_data = dict()
+        self.output_data = dict()
+        self.apply_fingerprint = None
+        # Set if a terraform command was run (not skipped) by the last init, plan, apply or destroy
+        self.terraform_ran = False
+        self.tf_logr = None
         if dry_run:
             self.setup_dry_module(module)
         else:
@@ -51,7 +68,7 @@ class ModuleRunner:
             git_token = self.module.source.git.git_token
         else:
             git_token = None
-        downloader = git.GitDownloadTemplate(git_url, git_token, self.module.name)
+        downloader = git.GitDownloadTemplate(git_url, git_token, self.module.name, self.parent.git_mirror_dir)
         self.working_dir = downloader.get_working_dir()
 
     def setup_dry_module(self, module):
@@ -63,46 +80,56 @@ class ModuleRunner:
         # Generate terraform template in the module folder
         cwd = os.getcwd()
         git_url = self.module.source.git.git_repo_url
-        pseudoTemplate = mock.MockTemplate(git_url, self.module)
+        pseudoTemplate = mock.MockTemplate(git_url, self.module, cwd)
         self.working_dir = pseudoTemplate.get_working_dir()
 
     def get_errors(self):
         return self.errors
 
     def init_module(self):
+        return asyncio.run(self.init_module_async())
+
+    def plan_module(self):
+        return asyncio.run(self.plan_module_async())
+
+    def apply_module(self):
+        return asyncio.run(self.apply_module_async())
+
+    def destroy_module(self):
+        return asyncio.run(self.destroy_module_async())
+
+    async def init_module_async(self):
         
         self.errors = []
+        self.terraform_ran = False
         print("==================================================================")
         print("Preparing for terraform init : " + str(self.module.name))
         tfvars_file, self.errors = self.prepare_tfvars()
         self.set_env()
-        tr = terraform.TerraformRunner(self.working_dir, var_file="blueprint.tfvars")
-        print("Running terraform init : " + str(self.module.name))
-        ret_code, stdout, stderr = tr.init()
+        tr = self.terraform_runner()
+        ret_code, stdout, stderr = await self.init_terraform(tr)
+        self.check_return_code("init", ret_code, stderr, tr)
         print("terraform init, return code: " + str(ret_code))
-        # print(stdout)
-        # eprint(stderr)
         print("==================================================================")
         return self.errors
 
-    def plan_module(self):
+    async def plan_module_async(self):
         
         self.errors = []
+        self.terraform_ran = False
         print("==================================================================")
         print("Preparing for terraform plan : " + str(self.module.name))
         tfvars_file, self.errors = self.prepare_tfvars()
         if self.ignore_validation_errors or len(self.errors) == 0:
             self.set_env()
-            tr = terraform.TerraformRunner(self.working_dir, var_file="blueprint.tfvars")
-            print("Running terraform init : " + str(self.module.name))
-            ret_code, stdout, stderr = tr.init()
+            tr = self.terraform_runner()
+            ret_code, stdout, stderr = await self.init_terraform(tr)
             print("terraform init, return code: " + str(ret_code))
-            tr = terraform.TerraformRunner(self.working_dir, var_file="blueprint.tfvars")
-            print("Running terraform plan : " + str(self.module.name))
-            ret_code, stdout, stderr = tr.plan()
-            print("terraform plan, return code: " + str(ret_code))
-            # print(stdout)
-            # eprint(stderr)
+            if self.check_return_code("init", ret_code, stderr, tr):
+                print("Running terraform plan : " + str(self.module.name))
+                ret_code, stdout, stderr = await self.run_terraform("plan", tr.plan, tr)
+                self.check_return_code("plan", ret_code, stderr, tr)
+                print("terraform plan, return code: " + str(ret_code))
         else:
             self.errors.append(event.ValidationEvent(event.BPError, "Did not run plan, since all the input parameters have not been dereferenced"))
             print("Did not run terraform plan : " + str(self.module.name))
@@ -110,9 +137,13 @@ class ModuleRunner:
         print("==================================================================")
         return self.errors
 
-    def apply_module(self):
+    async def apply_module_async(self):
         
         self.errors = []
+        self.terraform_ran = False
+        self.input_data = dict()
+        self.output_data = dict()
+        self.apply_fingerprint = None
         print("==================================================================")
         print("Preparing for terraform apply : " + str(self.module.name))
         tfvars_file, self.errors = self.prepare_tfvars()
@@ -131,36 +162,30 @@ class ModuleRunner:
                             else:
                                 input_data[input.name] = input.value
                 self.parent.save_module_input_data(input_data)
+                self.input_data = input_data
 
             self.set_env()
-            tr = terraform.TerraformRunner(self.working_dir, var_file="blueprint.tfvars")
-            print("Running terraform init : " + str(self.module.name))
-            ret_code, stdout, stderr = tr.init()
+            output_store = self.parent.output_store
+            apply_fingerprint = fingerprint.apply_fingerprint(self.working_dir, TfvarsFile, self.get_settings())
+            self.apply_fingerprint = apply_fingerprint
+            if not self.parent.force_apply and output_store.is_current(self.module.name, apply_fingerprint):
+                # Inputs, settings & source are unchanged since the last apply - reuse the saved outputs
+                print("Skipping terraform apply, no changes since the last apply : " + str(self.module.name))
+                self.output_data = output_store.get_outputs(self.module.name)
+                self.parent.save_module_output_data(self.output_data)
+                print("==================================================================")
+                return self.errors
+
+            output_store.invalidate(self.module.name)
+            tr = self.terraform_runner()
+            ret_code, stdout, stderr = await self.init_terraform(tr)
             print("terraform init, return code: " + str(ret_code))
-            tr = terraform.TerraformRunner(self.working_dir, var_file="blueprint.tfvars")
-            print("Running terraform apply : " + str(self.module.name))
-            ret_code, stdout, stderr = tr.apply()
-            print("terraform apply, return code: " + str(ret_code))
-            # print(stdout)
-            # eprint(stderr)
-
-            out_dict = tr.output()
-            # print("output : " + str(out_dict))
-            module_output_data_names = []
-            for output in self.module.outputs:
-                module_output_data_names.append(output.name)
-
-            if len(module_output_data_names) > 0:
-                output_data = dict()
-                for key in out_dict.keys():
-                    if key in module_output_data_names:
-                        (mod_vars, err) = self.module.output_ref(key)
-                        if err == None:
-                            output_data[mod_vars] = out_dict[key]["value"]
-                        else:
-                            self.errors.append(err)
-                # print(output_data)
-                self.parent.save_module_output_data(output_data)
+            if self.check_return_code("init", ret_code, stderr, tr):
+                print("Running terraform apply : " + str(self.module.name))
+                ret_code, stdout, stderr = await self.run_terraform("apply", tr.apply, tr)
+                print("terraform apply, return code: " + str(ret_code))
+                if self.check_return_code("apply", ret_code, stderr, tr):
+                    self.output_data = await self.save_outputs(tr, apply_fingerprint)
         else:
             self.errors.append(event.ValidationEvent(event.BPError, "Did not run apply, some input parameters are not dereferenced"))
             print("Did not run terraform apply : " + str(self.module.name))
@@ -168,20 +193,22 @@ class ModuleRunner:
         print("==================================================================")
         return self.errors
 
-    def destroy_module(self):
+    async def destroy_module_async(self):
         
         self.errors = []
+        self.terraform_ran = False
         print("==================================================================")
         print("Preparing for terraform destroy : " + str(self.module.name))
         tfvars_file, self.errors = self.prepare_tfvars()
         if self.ignore_validation_errors or len(self.errors) == 0:
             self.set_env()
-            tr = terraform.TerraformRunner(self.working_dir, var_file="blueprint.tfvars")
+            tr = self.terraform_runner()
             print("terraform destroy : " + str(self.module.name))
-            ret_code, stdout, stderr = tr.destroy()
+            self.parent.output_store.invalidate(self.module.name)
+            ret_code, stdout, stderr = await self.run_terraform("destroy", tr.destroy, tr)
+            if self.check_return_code("destroy", ret_code, stderr, tr):
+                self.parent.output_store.delete(self.module.name)
             print("terraform destroy, return code: " + str(ret_code))
-            # print(stdout)
-            # eprint(stderr)
         else:
             self.errors.append(event.ValidationEvent(event.BPError, "Did not run destroy, since all the input parameters have not been dereferenced"))
             print("Did not run terraform destroy : " + str(self.module.name))
@@ -189,36 +216,188 @@ class ModuleRunner:
         print("==================================================================")
         return self.errors
 
-    def prepare_tfvars(self):
+    async def init_terraform(self, tr):
+        """
+        Run terraform init, unless it was run earlier & the init inputs have not changed since
+        """
+        if not self.parent.force_init and fingerprint.is_init_current(self.working_dir, self.env):
+            print("Skipping terraform init, no changes since the last init : " + str(self.module.name))
+            return (0, [], [])
+
+        fingerprint.clear_init_state(self.working_dir)
+        async def locked_init():
+            if aioterraform.is_plugin_cache_warm(self.working_dir, self.parent.plugin_cache_dir):
+                # All the locked providers are in the cache - terraform init only reads the cache
+                print("Running terraform init : " + str(self.module.name))
+                return await tr.init()
+            # terraform init is not safe, with concurrent writes to the same plugin cache
+            async with self.parent.plugin_cache_lock():
+                print("Running terraform init : " + str(self.module.name))
+                return await tr.init()
+
+        ret_code, stdout, stderr = await self.run_terraform("init", locked_init, tr)
+        if ret_code == 0:
+            fingerprint.save_init_state(self.working_dir, self.env)
+        (hits, misses) = aioterraform.provider_install_stats(stdout)
+        self.parent.save_plugin_cache_stats(hits, misses)
+        return (ret_code, stdout, stderr)
+
+    async def run_terraform(self, command, tr_command, tr):
+        """
+        Run the terraform command, and retry (with exponential backoff) if it fails with a transient error
+        """
+        attempt = 0
+        self.terraform_ran = True
+        while True:
+            ret_code, stdout, stderr = await tr_command()
+            if ret_code == 0 or ret_code == aioterraform.TimeoutReturnCode or attempt >= self.parent.retries:
+                return (ret_code, stdout, stderr)
+            if not aioterraform.is_transient_failure(tr.diagnostics + stderr):
+                return (ret_code, stdout, stderr)
+            delay = aioterraform.backoff_delay(attempt, self.parent.retry_delay)
+            attempt += 1
+            print("terraform " + command + " failed with a transient error, retry " + str(attempt) + " of " + str(self.parent.retries) + 
+                    " in " + str(round(delay, 1)) + "s : " + str(self.module.name))
+            logr.warning("terraform " + command + " failed with a transient error for " + str(self.module.name) + ", retry " + str(attempt))
+            await asyncio.sleep(delay)
 
+    async def save_outputs(self, tr, apply_fingerprint=None):
+        out_dict = await tr.output()
+        if out_dict == None:
+            self.errors.append(event.ValidationEvent(event.BPError, "terraform output failed, after terraform apply", self.module.name))
+            # The outputs are unknown - the module must be applied again by the next run
+            self.parent.output_store.delete(self.module.name)
+            return dict()
+        # print("output : " + str(out_dict))
+        module_output_data_names = []
+        for output in self.module.outputs:
+            module_output_data_names.append(output.name)
+
+        output_data = dict()
+        output_records = []
+        complete = True
+        if len(module_output_data_names) > 0:
+            for key in out_dict.keys():
+                if key in module_output_data_names:
+                    (mod_vars, err) = self.module.output_ref(key)
+                    if err == None:
+                        output_data[mod_vars] = out_dict[key]["value"]
+                        output_records.append({"name": key, "ref": mod_vars, 
+                                                "value": out_dict[key].get("value"),
+                                                "type": out_dict[key].get("type"),
+                                                "sensitive": out_dict[key].get("sensitive", False)})
+                    else:
+                        self.errors.append(err)
+                        complete = False
+            for name in module_output_data_names:
+                if name not in out_dict:
+                    self.errors.append(event.ValidationEvent(event.BPWarning, "Output not found in the terraform output, after terraform apply", self.module.name, name))
+                    complete = False
+            # print(output_data)
+            self.parent.save_module_output_data(output_data)
+        if complete:
+            # Persist the outputs, for the later runs (plan of the dependent modules, partial runs)
+            self.parent.output_store.save(self.module.name, apply_fingerprint, output_records)
+        else:
+            # Incomplete outputs are not reused by the later runs - the module is applied again
+            self.parent.output_store.delete(self.module.name)
+        return output_data
+
+    def terraform_runner(self):
+        if self.parent.fake_engine != None:
+            return self.parent.fake_engine.runner(self.module.name, self.working_dir, var_file=TfvarsFile,
+                                                  timeout=self.parent.timeout,
+                                                  line_handler=self.print_line)
+        return aioterraform.AsyncTerraformRunner(self.working_dir, var_file=TfvarsFile,
+                                                 env=self.env,
+                                                 timeout=self.parent.timeout,
+                                                 line_handler=self.print_line,
+                                                 tail_lines=self.parent.tail_lines,
+                                                 json_output=self.parent.json_output)
+
+    def print_line(self, stream_name, line):
+        # The terraform output is saved in the (rotating) log file of the module
+        if self.tf_logr == None:
+            self.tf_logr = module_logger(self.module.name, self.parent.log_dir)
+        if stream_name == "stderr":
+            self.tf_logr.error(line)
+        else:
+            self.tf_logr.info(line)
+        if self.parent.quiet:
+            return
+        # Prefix the terraform output with the module name, since modules run concurrently
+        prefix = str(self.module.name) if self.parent.name == None else str(self.parent.name) + "/" + str(self.module.name)
+        if stream_name == "stderr":
+            print("[" + prefix + "] " + line, file=sys.stderr)
+        else:
+            print("[" + prefix + "] " + line)
+
+    def close_log(self):
+        # Close the log file of the module (reopened by the next run)
+        if self.tf_logr != None:
+            close_module_logger(self.tf_logr)
+            self.tf_logr = None
+
+    def check_return_code(self, command, ret_code, stderr, tr=None):
+        if ret_code == 0:
+            return True
+        # Evidence: the error diagnostics (-json), and the last lines of the terraform error output
+        evidence = []
+        if tr != None:
+            evidence += tr.diagnostics
+        evidence += stderr
+        self.errors.append(event.ValidationEvent(event.BPError, "terraform " + command + " failed, return code: " + str(ret_code), 
+                                                    self.module.name, "\n".join(evidence)))
+        return False
+
+    def prepare_tfvars(self):
+        """
+        Write the input values of the module to the blueprint.tfvars.json file (converted to the terraform type of the input)
+        """
+        tfvars = dict()
         inputs = self.module.inputs
         if inputs == None or inputs == "":
-            return (None, self.errors)
-        tfvars_str = ""
+            inputs = []
         for input in inputs:
             # TODO: Try to dereference the input values ?
             if str(input.value).startswith("$"):
                 self.errors.append(event.ValidationEvent(event.BPWarning, "Parameter value is not dereferenced for " + input.name))
             
             if self.ignore_validation_errors or not str(input.value).startswith("$"):
-                if input.type != None: 
-                    if input.type.lower() != "string":
-                        tfvars_str += (input.name + ' = ' + str(input.value))
-                    else:
-                        tfvars_str += (input.name + ' = "' + str(input.value) + '"')    
-                else:
-                    # assume the type is string
-                    tfvars_str += (input.name + ' = "' + str(input.value) + '"')
-                tfvars_str += "\n"
+                tfvars[input.name] = type_helper.to_tf_value(input.value, input.type)
 
-        tfvars_file_name = os.path.join(self.working_dir, "blueprint.tfvars")
+        tfvars_file_name = os.path.join(self.working_dir, TfvarsFile)
         with open(tfvars_file_name, "w") as tfvars_file:
-            tfvars_file.write(tfvars_str)
+            json.dump(tfvars, tfvars_file, indent=2)
+
+        return (tfvars, self.errors)
+
+    def current_apply_fingerprint(self):
+        """
+        Fingerprint of the inputs (blueprint.tfvars.json), settings & source of the module, with the current input values
+        """
+        errors = self.errors
+        self.errors = []
+        self.prepare_tfvars()
+        self.errors = errors
+        return fingerprint.apply_fingerprint(self.working_dir, TfvarsFile, self.get_settings())
 
-        return (tfvars_str, self.errors)
+    def get_settings(self):
+        # Dereferenced module settings (name -> value)
+        settings = dict()
+        if self.module.settings == None or self.module.settings == "":
+            return settings
+        for env in self.module.settings:
+            if not str(env.value).startswith("$"):
+                settings[env.name] = str(env.value)
+        return settings
 
     def set_env(self):
 
+        # Environment for the terraform process of this module (os.environ is shared by all the modules)
+        self.env = dict(os.environ)
+        if self.parent.plugin_cache_dir != None:
+            self.env["TF_PLUGIN_CACHE_DIR"] = self.parent.plugin_cache_dir
         settings = self.module.settings
         if settings == None or settings == "":
             return (None, self.errors)
@@ -227,5 +406,5 @@ class ModuleRunner:
             if str(env.value).startswith("$"):
                 self.errors.append(event.ValidationEvent(event.BPWarning, "Parameter value is not dereferenced for " + env.name))
             else:
-                os.environ[env.name] = str(env.value)
+                self.env[env.name] = str(env.value)
         
@@ -0,0 +1,150 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+# Folder (in the blueprint working_dir) for the state saved by the blueprint runner
+StateFolder = ".blueprint"
+OutputStoreFile = "outputs.db"
+
+# Version of the database schema (sqlite user_version)
+SchemaVersion = 1
+
+SchemaSql = [
+    """CREATE TABLE IF NOT EXISTS modules (
+        module      TEXT PRIMARY KEY,
+        fingerprint TEXT,
+        version     INTEGER NOT NULL,
+        updated     REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS outputs (
+        module      TEXT NOT NULL,
+        name        TEXT NOT NULL,
+        ref         TEXT NOT NULL,
+        value       TEXT,
+        type        TEXT,
+        sensitive   INTEGER NOT NULL DEFAULT 0,
+        version     INTEGER NOT NULL,
+        PRIMARY KEY (module, name)
+    )"""
+]
+
+class OutputStore:
+
+    def __init__(self, working_dir):
+        """
+        Persistent store of the module outputs (sqlite, in the working_dir/.blueprint folder).
+        The outputs of a module are saved after every successful apply, with their terraform type,
+        and the version of the apply (incremented on every apply of the module).
+        The fingerprint of the apply inputs is saved with the outputs.
+
+        :param working_dir: Blueprint working_dir
+        """
+        self.state_dir = os.path.join(os.path.abspath(working_dir), StateFolder)
+        self.db_file = os.path.join(self.state_dir, OutputStoreFile)
+        os.makedirs(self.state_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            with conn:
+                user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if user_version > SchemaVersion:
+                    raise ValueError("Output store " + self.db_file + " was created by a newer version of blueprint (schema " + str(user_version) + ")")
+                for sql in SchemaSql:
+                    conn.execute(sql)
+                conn.execute("PRAGMA user_version = " + str(SchemaVersion))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    def get_fingerprint(self, mod_name):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT fingerprint FROM modules WHERE module = ?", (mod_name,)).fetchone()
+        return None if row == None else row[0]
+
+    def is_current(self, mod_name, apply_fingerprint) -> bool:
+        saved_fingerprint = self.get_fingerprint(mod_name)
+        return saved_fingerprint != None and saved_fingerprint == apply_fingerprint
+
+    def get_version(self, mod_name) -> int:
+        """
+        Returns the version of the saved outputs of the module (0, if the outputs have not been saved)
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT version FROM modules WHERE module = ?", (mod_name,)).fetchone()
+        return 0 if row == None else row[0]
+
+    def get_outputs(self, mod_name=None) -> dict:
+        """
+        Returns the saved outputs (output reference -> value) of the module, or of all the modules
+        """
+        sql = "SELECT ref, value FROM outputs"
+        params = ()
+        if mod_name != None:
+            sql += " WHERE module = ?"
+            params = (mod_name,)
+        output_data = dict()
+        with closing(self._connect()) as conn:
+            for (ref, value) in conn.execute(sql, params):
+                output_data[ref] = json.loads(value) if value != None else None
+        return output_data
+
+    def get_output_types(self, mod_name) -> dict:
+        """
+        Returns the terraform type (output name -> type) of the saved outputs of the module
+        """
+        output_types = dict()
+        with closing(self._connect()) as conn:
+            for (name, type) in conn.execute("SELECT name, type FROM outputs WHERE module = ?", (mod_name,)):
+                output_types[name] = json.loads(type) if type != None else None
+        return output_types
+
+    def save(self, mod_name, apply_fingerprint, outputs):
+        """
+        Replace the outputs of the module, and increment the version of the module
+
+        :param outputs: List of dict {"name", "ref", "value", "type", "sensitive"}
+        """
+        with closing(self._connect()) as conn:
+            with conn:
+                row = conn.execute("SELECT version FROM modules WHERE module = ?", (mod_name,)).fetchone()
+                version = 1 if row == None else row[0] + 1
+                conn.execute("INSERT OR REPLACE INTO modules (module, fingerprint, version, updated) VALUES (?, ?, ?, ?)",
+                                (mod_name, apply_fingerprint, version, time.time()))
+                conn.execute("DELETE FROM outputs WHERE module = ?", (mod_name,))
+                conn.executemany("INSERT INTO outputs (module, name, ref, value, type, sensitive, version) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                [(mod_name, o["name"], o["ref"], json.dumps(o.get("value")), json.dumps(o.get("type")), 
+                                    1 if o.get("sensitive") else 0, version) for o in outputs])
+        logr.debug("Saved " + str(len(outputs)) + " outputs of the module " + str(mod_name) + ", version " + str(version))
+        return version
+
+    def invalidate(self, mod_name):
+        """
+        Forget the apply fingerprint of the module (the saved outputs are retained)
+        """
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("UPDATE modules SET fingerprint = NULL WHERE module = ?", (mod_name,))
+
+    def delete(self, mod_name):
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("DELETE FROM outputs WHERE module = ?", (mod_name,))
+                conn.execute("DELETE FROM modules WHERE module = ?", (mod_name,))
@@ -742,21 +742,22 @@ class Blueprint(dict):
 
     def propagate_module_data(self, module_data) -> List[event.ValidationEvent]:
         # module_data -> dict
+        # Only the references ($module..., $blueprint...) are looked up; dereferenced values can be lists or maps
         errors = []
         if self.modules != None:
             for mod in self.modules:
                 for p in mod.inputs:
-                    if p.value != None and p.value in module_data.keys():
+                    if isinstance(p.value, str) and p.value in module_data.keys():
                         mod.set_input_value(p.name, module_data[p.value])
 
                 for p in mod.settings:
-                    if p.value != None and p.value in module_data.keys():
+                    if isinstance(p.value, str) and p.value in module_data.keys():
                         mod.set_setting_value(p.name, module_data[p.value])
 
         if self.outputs != None:
             for p in self.outputs:
                 if p.value != None:
-                    if p.value != None and p.value in module_data.keys():
+                    if isinstance(p.value, str) and p.value in module_data.keys():
                         self.set_output_value(p.name, module_data[p.value])
 
         return errors
@@ -789,6 +790,22 @@ class Blueprint(dict):
         
         return g
 
+    def build_destroy_dag(self) -> dag.BlueprintGraph:
+        """
+        Dependency graph for destroy - the reverse of the module dependencies in build_dag:
+        a module is destroyed after all the modules that depend on it
+        """
+        forward = self.build_dag()
+        g = dag.BlueprintGraph()
+        if hasattr(self, "modules") and self.modules != None:
+            for m in self.modules:
+                for n in forward.dag.get(m.name, []):
+                    if n != "root" and n != "blueprint":
+                        g.addEdge(n, m.name)
+                g.addEdge("root", m.name)
+
+        return g
+
     def is_dag_empty(self, bp_graph: dag.BlueprintGraph) -> bool:
         return bp_graph.isEmpty()
 
@@ -802,8 +819,46 @@ class Blueprint(dict):
                 bp_graph.popNode(node_name)
             else:
                 return node_name
-        
+
         return None
 
+    def dag_ready_nodes(self, bp_graph: dag.BlueprintGraph) -> List[str]:
+        """
+        List all the modules, whose dependencies are complete (and can be run concurrently)
+        """
+        while not bp_graph.isEmpty():
+            ready_nodes = bp_graph.getIndependentNodes()
+            if len(ready_nodes) == 0:
+                raise ValueError("Circular dependencies in graph - No independent nodes")
+            pseudo_nodes = [n for n in ready_nodes if n == "root" or n == "blueprint"]
+            if len(pseudo_nodes) == 0:
+                return ready_nodes
+            for node_name in pseudo_nodes:
+                bp_graph.popNode(node_name)
+
+        return []
+
+    def dag_select_modules(self, bp_graph: dag.BlueprintGraph, targets: List[str], 
+                            with_dependents = False, with_dependencies = False) -> List[str]:
+        """
+        List the target modules, with their dependent modules and/or the modules they depend on
+        """
+        pseudo_nodes = ("root", "blueprint")
+        module_names = [m.name for m in self.modules] if hasattr(self, "modules") and self.modules != None else []
+        selected = []
+        for target in targets:
+            if target not in module_names:
+                raise ValueError("Invalid target module: " + str(target))
+            related = [target]
+            if with_dependencies:
+                related += bp_graph.getDependencies(target, pseudo_nodes)
+            if with_dependents:
+                related += bp_graph.getDependents(target, pseudo_nodes)
+            for mod_name in related:
+                if mod_name not in selected:
+                    selected.append(mod_name)
+        # in the order of the modules in the blueprint
+        return [m for m in module_names if m in selected]
+
 #======================================================================
 
@@ -17,6 +17,7 @@ import sys
 import re
 from typing import List
 import copy
+from collections import deque
 
 from os.path import exists as file_exists
 
@@ -27,8 +28,10 @@ from blueprint.schema import source as src
 
 from blueprint.validate import blueprint_validator
 from blueprint.circuit import bus
+from blueprint.sync import bptype
 
 from blueprint.lib import type_helper
+from blueprint.lib import event
 
 from python_terraform import *
 
@@ -44,321 +47,304 @@ def eprint(*args, **kwargs):
 
 class BlueprintReconciler:
 
-    def __init__(self, bp: blueprint.Blueprint):
+    def __init__(self, bp: blueprint.Blueprint, type_patterns_file=None):
+        """
+        Reconcile the parameter types & links of the blueprint (blueprint repair).
+
+        :param bp: Blueprint to reconcile
+        :param type_patterns_file: Type patterns (yaml or json), in addition to the builtin bptype patterns
+        """
         self.bp = bp
+        self.type_inference = bptype.TypeInference(bptype.load_type_patterns(type_patterns_file))
         self.cqt = bus.Circuit(bp)
+        self.errors = []            # ValidationEvents, from the reconcile
+        self._param_index = None    # linked-data reference -> param
+        self._param_refs = dict()   # id(param) -> linked-data reference
+        self._linked_types = dict() # linked-data reference -> resolved type
+
+    def _index_params(self, index, ref_prefix, params):
+        if params != None:
+            for param in params:
+                index[ref_prefix + param.name] = param
+                self._param_refs.setdefault(id(param), ref_prefix + param.name)
+
+    def _linked_params(self):
+        """
+        Index of the blueprint & module parameters, by their linked-data reference
+        ($blueprint.inputs.x, $module.m.outputs.y, ...); built once per reconcile.
+        """
+        if self._param_index != None:
+            return self._param_index
+        index = dict()
+        self._param_refs = dict()
+        self._index_params(index, '$blueprint.inputs.', getattr(self.bp, 'inputs', None))
+        self._index_params(index, '$blueprint.outputs.', getattr(self.bp, 'outputs', None))
+        self._index_params(index, '$blueprint.settings.', getattr(self.bp, 'settings', None))
+        # Short references ($blueprint.x), as repaired by Blueprint.from_yaml_data
+        for kind in ['inputs', 'settings', 'outputs']:
+            params = getattr(self.bp, kind, None)
+            if params != None:
+                for param in params:
+                    index.setdefault('$blueprint.' + param.name, param)
+        if hasattr(self.bp, 'modules') and self.bp.modules != None:
+            for mod in self.bp.modules:
+                mod_prefix = '$module.' + str(mod.name) + '.'
+                self._index_params(index, mod_prefix + 'inputs.', getattr(mod, 'inputs', None))
+                self._index_params(index, mod_prefix + 'outputs.', getattr(mod, 'outputs', None))
+                self._index_params(index, mod_prefix + 'settings.', getattr(mod, 'settings', None))
+        self._param_index = index
+        return index
+
+    def _reset_index(self):
+        # The parameters (or their types) were changed, outside the type resolution
+        self._param_index = None
+        self._param_refs = dict()
+        self._linked_types = dict()
+
+    def _own_type(self, param):
+        # Type of the param, without following the linked-data reference ('linked' or None, if not known)
+        if hasattr(param, 'type') and param.type != None:
+            type = param.type
+        elif hasattr(param, 'value') and param.value != None:
+            type = type_helper.val_type(param.value)
+        else:
+            type = None
+        if type == 'unknown':
+            type = None
+        return type
 
     def _linked_type(self, val):
-        if not (val.startswith('$blueprint') or val.startswith('$module')):
+        """
+        Type of the parameter, referred by the linked-data reference (val).
+        The chain of references is followed iteratively; the resolved type of each reference
+        in the chain is memoized, and a cyclic chain is reported (and resolved as None).
+        """
+        if not isinstance(val, str) or not (val.startswith('$blueprint') or val.startswith('$module')):
             return None
-        p = '\$module\.(.*)\.(.*)\.(.*)'
-        result = re.search(p, val)
-        if result != None:
-            mod_name = result[1]
-            param_name = result[2]
-            if self.bp.modules != None:
-                for mod in self.bp.modules:
-                    if mod.name == mod_name:
-                        if hasattr(mod, 'inputs') and mod.inputs != None:
-                            for param in mod.inputs:
-                                if param.name == param_name:
-                                    if hasattr(param, 'type') and param.type != None:
-                                        type = param.type
-                                    elif hasattr(param, 'value') and param.value != None:
-                                        type = type_helper.val_type(param.value)
-                                    else:
-                                        type = None
-                                    if type == 'unknown':
-                                        type = None
-                                    elif type == 'linked':
-                                        type = self._linked_type(param.value)
-                                    return type
-
-                        if hasattr(mod, 'outputs') and mod.outputs != None:
-                            for param in mod.outputs:
-                                if param.name == param_name:
-                                    if hasattr(param, 'type') and param.type != None:
-                                        type = param.type
-                                    elif hasattr(param, 'value') and param.value != None:
-                                        type = type_helper.val_type(param.value)
-                                    else:
-                                        type = None
-                                    if type == 'unknown':
-                                        type = None
-                                    elif type == 'linked':
-                                        type = self._linked_type(param.value)
-                                    return type
-
-                        if hasattr(mod, 'settings') and mod.settings != None:
-                            for param in mod.settings:
-                                if param.name == param_name:
-                                    if hasattr(param, 'type') and param.type != None:
-                                        type = param.type
-                                    elif hasattr(param, 'value') and param.value != None:
-                                        type = type_helper.val_type(param.value)
-                                    else:
-                                        type = None
-                                    if type == 'unknown':
-                                        type = None
-                                    elif type == 'linked':
-                                        type = self._linked_type(param.value)
-                                    return type
-        
-                        if hasattr(mod, 'injectors') and mod.injectors != None:
-                            for injtrs in mod.injectors:
-                                if hasattr(injtrs, 'tft_parameters') and injtrs.tft_parameters != None:
-                                    for param in injtrs.tft_parameters:
-                                        if hasattr(param, 'type') and param.type != None:
-                                            type = param.type
-                                        elif hasattr(param, 'value') and param.value != None:
-                                            type = type_helper.val_type(param.value)
-                                        else:
-                                            type = None
-                                        if type == 'unknown':
-                                            type = None
-                                        elif type == 'linked':
-                                            type = self._linked_type(param.value)
-                                        param.type = type
-
-        elif val.startswith('$blueprint.inputs.'):
-            param_name = val[len('$blueprint.inputs.'):]
-            for param in self.bp.inputs:
-                if param.name == param_name:
-                    if hasattr(param, 'type') and param.type != None:
-                        type = param.type
-                    elif hasattr(param, 'value') and param.value != None:
-                        type = type_helper.val_type(param.value)
-                    else:
-                        type = None
-                    if type == 'unknown':
-                        type = None
-                    elif type == 'linked':
-                        type = self._linked_type(param.value)
-                    return type
-        
-        elif val.startswith('$blueprint.outputs.'):
-            param_name = val[len('$blueprint.outputs.'):]
-            for param in self.bp.outputs:
-                if param.name == param_name:
-                    if hasattr(param, 'type') and param.type != None:
-                        type = param.type
-                    elif hasattr(param, 'value') and param.value != None:
-                        type = type_helper.val_type(param.value)
-                    else:
-                        type = None
-                    if type == 'unknown':
-                        type = None
-                    elif type == 'linked':
-                        type = self._linked_type(param.value)
-                    return type
-
-        elif val.startswith('$blueprint.settings.'):
-            param_name = val[len('$blueprint.settings.'):]
-            for param in self.bp.settings:
-                if param.name == param_name:
-                    if hasattr(param, 'type') and param.type != None:
-                        type = param.type
-                    elif hasattr(param, 'value') and param.value != None:
-                        type = type_helper.val_type(param.value)
-                    else:
-                        type = None
-                    if type == 'unknown':
-                        type = None
-                    elif type == 'linked':
-                        type = self._linked_type(param.value)
-                    return type
-
-        return None
+        index = self._linked_params()
+        chain = []
+        visited = set()
+        ref = val
+        type = None
+        while True:
+            if ref in self._linked_types:
+                type = self._linked_types[ref]
+                break
+            if ref in visited:
+                self.errors.append(event.ValidationEvent(event.BPError, "Cyclic linked-data reference", None, ref, " -> ".join(chain + [ref])))
+                type = None
+                break
+            chain.append(ref)
+            visited.add(ref)
+            param = index.get(ref)
+            if param == None:
+                type = None
+                break
+            type = self._own_type(param)
+            if type != 'linked':
+                break
+            ref = param.value
+            if not isinstance(ref, str):
+                type = None
+                break
+
+        for r in chain:
+            self._linked_types[r] = type
+        return type
     #---_linked_type(val)------------------------------------------------
 
-    def _reconcile_blueprint_types(self):
-        if hasattr(self.bp, 'inputs') and self.bp.inputs != None:
-            for param in self.bp.inputs:
-                if hasattr(param, 'type') and param.type != None:
-                    type = param.type
-                elif hasattr(param, 'value') and param.value != None:
-                    type = type_helper.val_type(param.value)
-                else:
-                    type = None
-                if type == 'unknown':
-                    type = None
-                elif type == 'linked':
-                    type = self._linked_type(param.value)
-                param.type = type
-
-        if hasattr(self.bp, 'outputs') and self.bp.outputs != None:
-            for param in self.bp.outputs:
-                if hasattr(param, 'type') and param.type != None:
-                    type = param.type
-                elif hasattr(param, 'value') and param.value != None:
-                    type = type_helper.val_type(param.value)
-                else:
-                    type = None
-                if type == 'unknown':
-                    type = None
-                elif type == 'linked':
-                    type = self._linked_type(param.value)
-                param.type = type
-
-        if hasattr(self.bp, 'settings') and self.bp.settings != None:
-            for param in self.bp.settings:
-                if hasattr(param, 'type') and param.type != None:
-                    type = param.type
-                elif hasattr(param, 'value') and param.value != None:
-                    type = type_helper.val_type(param.value)
-                else:
-                    type = None
-                if type == 'unknown':
-                    type = None
-                elif type == 'linked':
-                    type = self._linked_type(param.value)
-                param.type = type
-        
-        else:
-            pass
-    #---------------------------------------------------------------
-
-    def _reconcile_module_types(self):
+    def _reconciled_params(self) -> List:
+        # The blueprint & module parameters, whose types are reconciled
+        params = []
+        for kind in ['inputs', 'outputs', 'settings']:
+            if hasattr(self.bp, kind) and getattr(self.bp, kind) != None:
+                params.extend(getattr(self.bp, kind))
         if hasattr(self.bp, 'modules') and self.bp.modules != None:
             for mod in self.bp.modules:
-                if hasattr(mod, 'inputs') and mod.inputs != None:
-                    for param in mod.inputs:
-                        if hasattr(param, 'type') and param.type != None:
-                            type = param.type
-                        elif hasattr(param, 'value') and param.value != None:
-                            type = type_helper.val_type(param.value)
-                        else:
-                            type = None
-                        if type == 'unknown':
-                            type = None
-                        elif type == 'linked':
-                            type = self._linked_type(param.value)
-                        param.type = type
-
-                if hasattr(mod, 'outputs') and mod.outputs != None:
-                    for param in mod.outputs:
-                        if hasattr(param, 'type') and param.type != None:
-                            type = param.type
-                        elif hasattr(param, 'value') and param.value != None:
-                            type = type_helper.val_type(param.value)
-                        else:
-                            type = None
-                        if type == 'unknown':
-                            type = None
-                        elif type == 'linked':
-                            type = self._linked_type(param.value)
-                        param.type = type
-
-                if hasattr(mod, 'settings') and mod.settings != None:
-                    for param in mod.settings:
-                        if hasattr(param, 'type') and param.type != None:
-                            type = param.type
-                        elif hasattr(param, 'value') and param.value != None:
-                            type = type_helper.val_type(param.value)
-                        else:
-                            type = None
-                        if type == 'unknown':
-                            type = None
-                        elif type == 'linked':
-                            type = self._linked_type(param.value)
-                        param.type = type
-
+                for kind in ['inputs', 'outputs', 'settings']:
+                    if hasattr(mod, kind) and getattr(mod, kind) != None:
+                        params.extend(getattr(mod, kind))
                 if hasattr(mod, 'injectors') and mod.injectors != None:
                     for injtrs in mod.injectors:
                         if hasattr(injtrs, 'tft_parameters') and injtrs.tft_parameters != None:
-                            for param in injtrs.tft_parameters:
-                                if hasattr(param, 'type') and param.type != None:
-                                    type = param.type
-                                elif hasattr(param, 'value') and param.value != None:
-                                    type = type_helper.val_type(param.value)
-                                else:
-                                    type = None
-                                if type == 'unknown':
-                                    type = None
-                                elif type == 'linked':
-                                    type = self._linked_type(param.value)
-                                param.type = type
+                            params.extend(injtrs.tft_parameters)
+        return params
+
+    def _wire_graph(self, params):
+        """
+        Wires (source param, linked param) of the blueprint circuit, from the linked-data references
+        of the parameters; includes the links between the blueprint parameters.
+        """
+        index = self._linked_params()
+        wires = []
+        for param in params:
+            val = param.value if hasattr(param, 'value') else None
+            if isinstance(val, str) and (val.startswith('$blueprint') or val.startswith('$module')):
+                source = index.get(val)
+                if source != None and source is not param:
+                    wires.append((source, param))
+        return wires
+
+    def _param_ref(self, param) -> str:
+        return self._param_refs.get(id(param), str(param.name))
+
+    def _propagate_types(self, types, seeds, linked, sources):
+        # Forward: source -> linked params
+        typed = [p for p in seeds if types[id(p)] != None]
+        worklist = deque(typed)
+        while len(worklist) > 0:
+            source = worklist.popleft()
+            for target in linked.get(id(source), []):
+                if types[id(target)] == None:
+                    types[id(target)] = types[id(source)]
+                    worklist.append(target)
+                    typed.append(target)
+
+        # Backward: linked params -> untyped source (for example, a blueprint input promoted without type)
+        worklist = deque([p for p in typed if id(p) in sources])
+        while len(worklist) > 0:
+            target = worklist.popleft()
+            for source in sources.get(id(target), []):
+                if types[id(source)] == None:
+                    types[id(source)] = types[id(target)]
+                    worklist.append(source)
+
+    def _reconcile_types(self):
+        """
+        Propagate the parameter types along the wires, with a worklist, until no type changes.
+        The declared types (and the types of the literal values) are fixed; a linked parameter
+        gets the type of its source, then an untyped source gets the type of its linked parameters.
+        Each parameter enters the worklist once (when its type is known), so the propagation is O(V+E).
+        The parameters left without type are typed from their names (bptype patterns), and propagated again.
+        Wires between parameters of different types are reported.
+        """
+        params = self._reconciled_params()
+        wires = self._wire_graph(params)
+
+        types = dict()      # id(param) -> type
+        linked = dict()     # id(source) -> linked params
+        sources = dict()    # id(linked param) -> source params
+        for param in params:
+            type = self._own_type(param)
+            types[id(param)] = None if type == 'linked' else type
+        for (source, target) in wires:
+            types.setdefault(id(source), self._own_type(source))
+            linked.setdefault(id(source), []).append(target)
+            sources.setdefault(id(target), []).append(source)
+
+        self._propagate_types(types, params, linked, sources)
+
+        # The types from the parameter names (bptype patterns), for the parameters still without type
+        inferred = []
+        for param in params:
+            if types[id(param)] == None:
+                type = self.type_inference.infer(param.name)
+                if type != None:
+                    types[id(param)] = type
+                    inferred.append(param)
+        if len(inferred) > 0:
+            self._propagate_types(types, inferred, linked, sources)
+
+        for param in params:
+            if types[id(param)] == None and hasattr(param, 'value') and isinstance(param.value, str):
+                # Reports the cyclic references, that could not be resolved
+                self._linked_type(param.value)
+            param.type = types[id(param)]
+
+        for (source, target) in wires:
+            if not type_helper.is_compatible_type(source.type, target.type):
+                self.errors.append(event.ValidationEvent(event.BPWarning, "Conflicting types of the linked parameters", None,
+                                    self._param_ref(source) + " (" + str(source.type) + ") -> " + self._param_ref(target) + " (" + str(target.type) + ")"))
 
     #---------------------------------------------------------------
 
+    def _unique_name(self, name, names_in_use) -> str:
+        # Name for the promoted parameter, with a numeric suffix if the acronym-prefixed name is in use
+        unique_name = name
+        suffix = 2
+        while unique_name in names_in_use:
+            unique_name = name + '_' + str(suffix)
+            suffix += 1
+        names_in_use.add(unique_name)
+        return unique_name
+
     def _promote_unlinked_mod_params(self):
-        if hasattr(self.bp, 'modules') and self.bp.modules != None:
-            bpm = blueprint_validator.BlueprintModel(self.bp)
-            mod_input_refs = bpm.mod_input_value.keys()
-            mod_input_vars = [x.split('.')[-1] for x in mod_input_refs]
-            if hasattr(self.bp, 'inputs') and self.bp.inputs != None:
-                bp_input_vars = [x.name for x in self.bp.inputs]
-            else:
-                bp_input_vars = []
-
-            mod_output_refs = bpm.mod_output_value.keys()
-            mod_output_vars = [x.split('.')[-1] for x in mod_output_refs]
-            if hasattr(self.bp, 'outputs') and self.bp.outputs != None:
-                bp_output_vars = [x.name for x in self.bp.outputs]
-            else:
-                bp_output_vars = []
-
-            mod_setting_refs = bpm.mod_setting_value.keys()
-            mod_setting_vars = [x.split('.')[-1] for x in mod_setting_refs]
-            if hasattr(self.bp, 'settings') and self.bp.settings != None:
-                bp_setting_vars = [x.name for x in self.bp.settings]
-            else:
-                bp_setting_vars = []
-
-            for pname in mod_input_vars:
-                if pname not in bp_input_vars:
-                    for mod in self.bp.modules:
-                        if hasattr(mod, 'inputs') and mod.inputs != None:
-                            input_param = None
-                            for x in mod.inputs:
-                                if x.name == pname:
-                                    input_param = x
-                                    break
-                            if input_param != None:
-                                bp_bus = bus.WireBus(self.bp, mod)
-                                mod_acy = mod.get_acronym().upper()
-                                bp_pname = mod_acy + '_' + pname
-                                bp_bus.add_wire(bp_pname, pname, from_connector_type=bus.Input, to_connector_type=bus.Input)
-                                break
-
-            for pname in mod_output_vars:
-                if pname not in bp_output_vars:
-                    for mod in self.bp.modules:
-                        if hasattr(mod, 'outputs') and mod.outputs != None:
-                            output_param = None
-                            for x in mod.outputs:
-                                if x.name == pname:
-                                    output_param = x
-                                    break
-                            if output_param != None:
-                                bp_bus = bus.WireBus(mod, self.bp)
-                                mod_acy = mod.get_acronym().upper()
-                                bp_pname = mod_acy + '_' + pname
-                                bp_bus.add_wire(pname, bp_pname, from_connector_type=bus.Output, to_connector_type=bus.Output)
-                                break
-
-            for pname in mod_setting_vars:
-                if pname not in bp_setting_vars:
-                    for mod in self.bp.modules:
-                        if hasattr(mod, 'settings') and mod.settings != None:
-                            setting_param = None
-                            for x in mod.settings:
-                                if x.name == pname:
-                                    setting_param = x
-                                    break
-                            if setting_param != None:
-                                bp_bus = bus.WireBus(self.bp, mod)
-                                mod_acy = mod.get_acronym().upper()
-                                bp_pname = mod_acy + '_' + pname
-                                bp_bus.add_wire(bp_pname, pname, from_connector_type=bus.Setting, to_connector_type=bus.Setting)
-                                break
+        """
+        Promote the unlinked module parameters (with a literal value, or without value) to the blueprint,
+        as <MODULE-ACRONYM>_<param-name>, and link them. One pass over the modules, with the blueprint
+        parameter names (and the module outputs already linked to the blueprint) in sets; the promoted
+        parameters are added to the blueprint in a batch, per kind, and their wires to the circuit (cqt).
+        """
+        if not hasattr(self.bp, 'modules') or self.bp.modules == None:
+            return
+
+        kinds = ['inputs', 'outputs', 'settings']
+        bp_param_names = dict()     # kind -> names of the existing blueprint parameters
+        names_in_use = dict()       # kind -> names of the existing & promoted blueprint parameters
+        promoted = dict()           # kind -> promoted blueprint parameters
+        wires = []                  # wires of the promoted parameters
+        connector_types = {'inputs': bus.Input, 'outputs': bus.Output, 'settings': bus.Setting}
+        for kind in kinds:
+            bp_params = getattr(self.bp, kind) if hasattr(self.bp, kind) and getattr(self.bp, kind) != None else []
+            bp_param_names[kind] = set([p.name for p in bp_params])
+            names_in_use[kind] = set(bp_param_names[kind])
+            promoted[kind] = []
+
+        linked_outputs = set()
+        if hasattr(self.bp, 'outputs') and self.bp.outputs != None:
+            for p in self.bp.outputs:
+                if hasattr(p, 'value') and isinstance(p.value, str):
+                    linked_outputs.add(p.value)
+
+        for mod in self.bp.modules:
+            mod_acy = mod.get_acronym().upper()
+            for kind in kinds:
+                if not hasattr(mod, kind) or getattr(mod, kind) == None:
+                    continue
+                for mod_param in getattr(mod, kind):
+                    if mod_param.name in bp_param_names[kind]:
+                        continue
+                    mod_param_ref = '$module.' + str(mod.name) + '.' + kind + '.' + mod_param.name
+                    if kind == 'outputs':
+                        if mod_param_ref in linked_outputs:
+                            continue
+                    elif hasattr(mod_param, 'value') and isinstance(mod_param.value, str) and \
+                        (mod_param.value.startswith('$blueprint') or mod_param.value.startswith('$module')):
+                        continue
+
+                    bp_param = copy.deepcopy(mod_param)
+                    bp_param.name = self._unique_name(mod_acy + '_' + mod_param.name, names_in_use[kind])
+                    if kind == 'outputs':
+                        # module output -> blueprint output
+                        bp_param.value = mod_param_ref
+                        wire = bus.Wire(mod, mod_param.name, self.bp, bp_param.name,
+                                        from_connector_type=bus.Output, to_connector_type=bus.Output)
+                        wire.link(mod_param, bp_param)
+                    else:
+                        # blueprint input (or setting) -> module input (or setting); the value moves to the blueprint
+                        mod_param.value = '$blueprint.' + kind + '.' + bp_param.name
+                        wire = bus.Wire(self.bp, bp_param.name, mod, mod_param.name,
+                                        from_connector_type=connector_types[kind], to_connector_type=connector_types[kind])
+                        wire.link(bp_param, mod_param)
+                    promoted[kind].append(bp_param)
+                    wires.append(wire)
+
+        if len(promoted['inputs']) > 0:
+            self.bp.add_inputs(promoted['inputs'])
+        if len(promoted['outputs']) > 0:
+            self.bp.add_outputs(promoted['outputs'])
+        if len(promoted['settings']) > 0:
+            self.bp.add_settings(promoted['settings'])
+        self.cqt.add_wires(wires)
+        self._reset_index()
 
     #---------------------------------------------------------------
 
-    def reconcile(self):
-        
-        self._reconcile_blueprint_types()
-        self._reconcile_module_types()
+    def reconcile(self) -> List[event.ValidationEvent]:
+        self.errors = []
+        self._reset_index()
+        self._reconcile_types()
         self._promote_unlinked_mod_params()
+        return self.errors
 
 
@@ -14,6 +14,7 @@
 
 import os
 import sys
+import json
 import yaml
 from typing import List
 
@@ -28,21 +29,225 @@ from blueprint.schema import source as src
 from blueprint.circuit import bus
 
 from blueprint.lib import git
+from blueprint.lib import event
 from blueprint.lib import type_helper
 from blueprint.lib import bfile
+from blueprint.lib import tfscan
+from blueprint.sync import inspectcache
+from blueprint.sync import bptype
 
 from python_terraform import *
 
 import subprocess
+import hashlib
+import concurrent.futures
 
 from blueprint.lib.logger import logr
 # import logging
 # logr = logging.getLogger(__name__)
 
+# Number of modules downloaded & inspected concurrently
+SyncWorkers = 8
+
+# Inspectors of the terraform modules: the built-in scanner (default), or the terraform-config-inspect tool
+BuiltinInspector = 'builtin'
+ConfigInspectInspector = 'terraform-config-inspect'
+
 def eprint(*args, **kwargs):
     logr.error(*args)
     print(*args, file=sys.stderr, **kwargs)
 
+def decode_inspector_json(config_json) -> dict:
+    """
+    Decode the output of terraform-config-inspect --json (bytes or str)
+    """
+    try:
+        config_json_data = json.loads(config_json)
+    except ValueError as e:
+        raise ValueError('Invalid terraform-config-inspect output : ' + str(e))
+    if not isinstance(config_json_data, dict):
+        raise ValueError('Invalid terraform-config-inspect output, expected a json object')
+    return config_json_data
+
+def decode_inspection(config_json_data):
+    """
+    Decode the inspection of a terraform module (terraform-config-inspect --json structure)
+    into the tuple (List[param.Input], List[param.Output]), in the order of the inspection
+    """
+    inputs = []
+    outputs = []
+    if config_json_data == None:
+        return (inputs, outputs)
+
+    variables = config_json_data.get('variables')
+    for key, config_value in (variables.items() if isinstance(variables, dict) else []):
+        type = config_value.get('type')
+        description = config_value.get('description', '')
+        val = config_value.get('default')
+        if type == None:
+            if val != None:
+                type = type_helper.val_type(val)
+                if type == 'str' and (val.startswith('$blueprint') or val.startswith('$module')):
+                    type = None
+            if type == 'unknown':
+                type = None
+        inputs.append(param.Input(key, type=type, description=description, value=val))
+
+    config_outputs = config_json_data.get('outputs')
+    for key, value in (config_outputs.items() if isinstance(config_outputs, dict) else []):
+        outputs.append(param.Output(key, description=value.get('description', '')))
+    return (inputs, outputs)
+
+def inspector_version(tic_path) -> str:
+    """
+    Version of the terraform-config-inspect tool (its size & modification time), part of the inspection cache key
+    """
+    tic_file = os.path.join(tic_path, 'terraform-config-inspect')
+    try:
+        st = os.stat(tic_file)
+    except OSError:
+        return 'terraform-config-inspect'
+    digest = hashlib.sha256((os.path.abspath(tic_file) + ':' + str(st.st_size) + ':' + str(st.st_mtime_ns)).encode('utf-8'))
+    return 'terraform-config-inspect:' + digest.hexdigest()[:16]
+
+class ModuleInspector:
+
+    def __init__(self, working_dir, parallelism=SyncWorkers, use_cache=True, inspector=BuiltinInspector,
+                    type_patterns_file=None, git_mirror_dir=None):
+        """
+        Download & inspect the terraform modules concurrently, for the sync of one or more blueprints.
+        Each module git url is downloaded & inspected once, even if it is used by several modules or blueprints;
+        the inspection is decoded into new param lists for each module.
+
+        :param working_dir: Working directory, for the downloaded modules & the inspection cache
+        :param parallelism: Number of modules downloaded & inspected concurrently
+        :param use_cache: Reuse the inspection of the modules, whose git repo has not changed since the last sync
+        :param inspector: 'builtin' or 'terraform-config-inspect' (see BlueprintMorphius.sync_blueprint)
+        :param type_patterns_file: Type patterns (yaml or json), in addition to the builtin bptype patterns
+        :param git_mirror_dir: Folder for the local mirrors of the git repos (see git.GitDownloadTemplate), so that
+                            a repo used by several modules is fetched once; default: no mirror
+        """
+        self.tic_path = os.getenv('TERRAFORM_CONFIG_INSPECT_PATH')
+        if inspector == BuiltinInspector:
+            inspectors = [BuiltinInspector] if self.tic_path == None else [BuiltinInspector, ConfigInspectInspector]
+        elif inspector == ConfigInspectInspector:
+            if self.tic_path == None:
+                err_msg = 'Could not find terraform-config-inspect.  Install and set install path in environment $TERRAFORM_CONFIG_INSPECT_PATH'
+                logr.error(err_msg)
+                raise ValueError(err_msg)
+            inspectors = [ConfigInspectInspector]
+        else:
+            raise ValueError('Invalid inspector : ' + str(inspector))
+        self.type_inference = bptype.TypeInference(bptype.load_type_patterns(type_patterns_file))
+
+        if not os.path.exists(working_dir):
+            logr.info('Working directory does not exists.  Creating the required working director : ' + str(os.path.abspath(working_dir)))
+            os.makedirs(working_dir, exist_ok=True)
+        self.working_dir = os.path.abspath(working_dir)
+        self.cache = inspectcache.InspectCache(self.working_dir) if use_cache else None
+        versions = {BuiltinInspector: 'builtin:' + tfscan.ScannerVersion}
+        if self.tic_path != None:
+            versions[ConfigInspectInspector] = inspector_version(self.tic_path)
+        self.inspectors = [(name, versions[name]) for name in inspectors]
+        self.git_mirror_dir = os.path.abspath(git_mirror_dir) if git_mirror_dir != None else None
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, parallelism))
+        self.inspections = dict()   # (git url, git token) -> future of the inspection
+        self.folders = dict()       # download folder (in the working_dir) -> (git url, git token)
+
+    def _key(self, mod):
+        git_url = mod.source.git.git_repo_url
+        git_token = mod.source.git.git_token if hasattr(mod.source.git, 'git_token') else None
+        return (git_url, git_token)
+
+    def _download_folder(self, mod, key) -> str:
+        # The module name, unless another git url (of another blueprint) already uses it
+        folder = str(mod.name)
+        if folder in self.folders and self.folders[folder] != key:
+            folder = folder + '-' + hashlib.sha256(str(key[0]).encode('utf-8')).hexdigest()[:8]
+        self.folders[folder] = key
+        return folder
+
+    def submit(self, mod):
+        """
+        Start the download & inspection of the module (if its git url is not already inspected)
+        """
+        key = self._key(mod)
+        if key not in self.inspections:
+            folder = self._download_folder(mod, key)
+            self.inspections[key] = self.executor.submit(self.inspect_module_config, mod, folder)
+        return self.inspections[key]
+
+    def module_params(self, mod):
+        """
+        Wait for the inspection of the module, and decode it into (List[param.Input], List[param.Output]);
+        the parameters without type are typed from their names
+        """
+        config_json_data = self.submit(mod).result()
+        (inputs, outputs) = decode_inspection(config_json_data)
+        self.type_inference.infer_types(inputs)
+        self.type_inference.infer_types(outputs)
+        return (inputs, outputs)
+
+    def shutdown(self):
+        # The inspections not yet started are cancelled
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def inspect_module_config(self, mod, folder=None):
+        """
+        Download the terraform module (in the folder of the working_dir, default: the module name) & inspect
+        its variables and outputs (runs in a worker thread).
+        The inspectors are tried in turn, until one succeeds.
+        The inspection is reused from the cache, if the commit of the git repo has been inspected earlier;
+        a new inspection is cached with the commit of the cloned checkout (the repo can change after the lookup).
+        """
+        (git_url, git_token) = self._key(mod)
+        cache = self.cache
+        inspectors = self.inspectors
+
+        repo = None
+        commit = None
+        repo_folder = None
+        if cache != None:
+            # The default branch is cloned: resolve its current commit, without cloning the repo
+            repo = git.repo_url(git_url)
+            repo_folder = str(giturlparse.parse(git_url).name)
+            commit = git.resolve_commit(git_url, git_token)
+            for (name, version) in inspectors:
+                config_json_data = cache.get(repo, commit, repo_folder, version)
+                if config_json_data != None:
+                    logr.info('Using the cached inspection of the module ' + mod.name + ' (commit ' + commit + ')')
+                    return config_json_data
+
+        downloader = git.GitDownloadTemplate(git_url, git_token, folder if folder != None else mod.name,
+                                                mirror_dir=self.git_mirror_dir, base_dir=self.working_dir)
+        wd = downloader.get_working_dir()
+
+        for (name, version) in inspectors:
+            try:
+                if name == BuiltinInspector:
+                    config_json_data = tfscan.scan_module(wd)
+                else:
+                    config_json_data = self.run_config_inspect(self.tic_path, wd)
+            except ValueError as e:
+                if (name, version) == inspectors[-1]:
+                    raise
+                logr.warning('Could not inspect the module ' + mod.name + ' with the ' + name + ' inspector, trying the next one : ' + str(e))
+                continue
+            if cache != None:
+                if downloader.get_commit() != commit:
+                    logr.info('The git repo of the module ' + mod.name + ' changed after the cache lookup, caching the inspection of commit ' + str(downloader.get_commit()))
+                cache.put(repo, downloader.get_commit(), repo_folder, version, config_json_data)
+            return config_json_data
+        return None
+
+    def run_config_inspect(self, tic_path, wd):
+        result = subprocess.run([os.path.join(tic_path, 'terraform-config-inspect'), wd, '--json'], 
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise ValueError('terraform-config-inspect failed for ' + str(wd) + ' : ' + result.stderr.decode('utf-8', errors='replace'))
+        return decode_inspector_json(result.stdout)
+
 class BlueprintMorphius:
 
     def __init__(self, 
@@ -136,7 +341,7 @@ class BlueprintMorphius:
                 git_source = src.GitSource(git_url, git_branch, git_token)
                 source = src.TemplateSource('github', git_source)
 
-                modules.append(module.Module(name, module_type, source))
+                modules.append(module.Module(name, module_type, source=source))
 
         except (KeyError, UnboundLocalError, TypeError) as e:
             logr.debug('Attribute error while reading & initializing modules from git_sources' + str(e))
@@ -144,20 +349,25 @@ class BlueprintMorphius:
         return cls(name=bp_name, description=description, inputs=inputs, 
                     outputs=outputs, settings=settings, modules=modules)
 
-    def sync_blueprint(self, working_dir, annotate=False) -> blueprint.Blueprint:
+    def sync_blueprint(self, working_dir, annotate=False, parallelism=SyncWorkers, use_cache=True,
+                        inspector=BuiltinInspector, type_patterns_file=None, module_inspector=None) -> blueprint.Blueprint:
+        """
+        Add the inputs & outputs of the terraform modules (from their git repos) to the blueprint.
+
+        :param parallelism: Number of modules downloaded & inspected concurrently
+        :param use_cache: Reuse the inspection of the modules, whose git repo has not changed since the last sync
+        :param inspector: 'builtin' to scan the terraform files in python, with terraform-config-inspect as fallback
+                            (if $TERRAFORM_CONFIG_INSPECT_PATH is set); or 'terraform-config-inspect'
+        :param type_patterns_file: Type patterns (yaml or json), in addition to the builtin bptype patterns, for
+                            typing the module parameters without type from their names
+        :param module_inspector: ModuleInspector shared by several blueprints (see sync_blueprints); the other
+                            options are then ignored
+        """
         cwd = os.getcwd()
-
-        tic_path = os.getenv('TERRAFORM_CONFIG_INSPECT_PATH')
-        if tic_path == None:
-            err_msg = 'Could not find terraform-config-inspect.  Install and set install path in environment $TERRAFORM_CONFIG_INSPECT_PATH'
-            logr.error(err_msg)
-            raise ValueError(err_msg)
-
-        if not os.path.exists(working_dir):
-            logr.info('Working directory does not exists.  Creating the required working director : ' + str(os.path.abspath(working_dir)))
-            os.makedirs(working_dir, exist_ok=True)
-        working_dir = os.path.abspath(working_dir)
-        os.chdir(working_dir)
+        shared_inspector = module_inspector != None
+        if not shared_inspector:
+            module_inspector = ModuleInspector(working_dir, parallelism, use_cache, inspector, type_patterns_file)
+        os.chdir(module_inspector.working_dir)
 
         bp = blueprint.Blueprint(name=self.name, description=self.description, 
                                     inputs=self.inputs,
@@ -165,142 +375,182 @@ class BlueprintMorphius:
                                     settings=self.settings,
                                     modules=self.modules)
         
-        if bp.modules != None and len(bp.modules) > 0:
-            for mod in bp.modules:
-                git_url = mod.source.git.git_repo_url
-                if hasattr(mod.source.git, 'git_token'):
-                    git_token = mod.source.git.git_token
-                else:
-                    git_token = None
-                
-                downloader = git.GitDownloadTemplate(git_url, git_token, mod.name)
-                wd = downloader.get_working_dir()
-
-                result = subprocess.run([os.path.join(tic_path, 'terraform-config-inspect'), wd, '--json'], stdout=subprocess.PIPE)
-                config_json = result.stdout
-                config_json_data = yaml.safe_load(config_json)
-
-                if config_json != None:
-                    config_json_data = yaml.safe_load(config_json)
-
-                    #==============================
-                    # Processing input variables
-                    config_input_vars = list(config_json_data['variables'].keys())
-                    logr.info('Processing inputs: ' + str(config_input_vars))
-                    existing_input_vars = mod.list_input_param_names()
-
-                    for key in config_input_vars:
-
-                        config_value = config_json_data['variables'][key]
-                        if 'type' in config_value.keys():
-                            type=config_value['type']
-                        else:
-                            type=None
-                        if 'description' in config_value.keys():
-                            description=config_value['description']
-                        else:
-                            description=''
-                        if 'default' in config_value.keys():
-                            val=config_value['default']
-                        else:
-                            val=None
-                        if type == None:
-                            if val != None:
-                                type = type_helper.val_type(val)
-                                if type == 'str' and (val.startswith('$blueprint') or val.startswith('$module')):
-                                    type = None
-                            if type == 'unknown':
-                                type = None
-
-                        # If key already present in the 'mod', then update parameter
-                        if key in existing_input_vars:
-                            type2 = mod.get_input_attr(key, "type")
-                            description2 = mod.get_input_attr(key, "description")
-                            val2 = mod.get_input_attr(key, "value")
-                            comment2 = 'NOTES: update param '
-                            is_updated = False
-                            if type != type2:
-                                comment2 += f'type({type2} --> {type}) '
-                                is_updated = True
-                            if description != description2:
-                                comment2 += f'description({description2} --> {description}) '
-                                is_updated = True
-                            if val != val2 and not (val2.startswith('$blueprint.') or val2.startswith('$module.')):
-                                comment2 += f'value({val2} --> {val})'
-                                is_updated = True
-                            if is_updated == True and type == None:
-                                if val != None:
-                                    type = type_helper.val_type(val)
-                                    if type == 'str' and (val.startswith('$blueprint') or val.startswith('$module')):
-                                        type = None
-                                if type == 'unknown':
-                                    type = None
-
-                            if is_updated:
-                                p = param.Input(key, type=type, description=description, value=val, comment=comment2 if annotate else None)
-                                mod.update_input(p)
-                        else:
-                            p = param.Input(key, type=type, description=description, value=val, comment='NOTES: add param' if annotate else None)
-                            mod.inputs.append(p)
-
-                        # if p.value == None and key not in bp.list_input_param_names():
-                        #     bp_input = param.Input(key, type=type, description=description, value=val, comment='NOTES: add param' if annotate else None)
-                        #     bp.add_input(bp_input)
-                        #     bp_bus = bus.WireBus(bp, mod)
-                        #     bp_bus.add_wire(bp_input.name, p.name)
-
-                    config_input_vars = list(config_json_data['variables'].keys())
-                    # existing_input_vars = mod.list_input_param_names()
-                    for key in existing_input_vars:
-                        if key not in config_input_vars and annotate:
-                            mod.set_input_attr(key, 'comment', 'TODO: delete param')
-                    
-                    #==============================
-                    # Processing output variables
-                    config_output_vars = list(config_json_data['outputs'].keys())
-                    logr.info('Processing outputs: ' + str(config_output_vars))
-                    existing_output_vars = mod.list_output_param_names()
-                    for key in config_output_vars:
-
-                        value = config_json_data['outputs'][key]
-                        if 'description' in value.keys():
-                            description=value['description']
-                        else:
-                            description=''
-                        # If key already present in the 'mod', then skip
-                        if key in existing_output_vars:
-                            description2 = mod.get_output_attr(key, "description")
-                            comment2 = 'NOTES: update param '
-                            is_updated = False
-                            if description != description2:
-                                comment2 += f'description({description} --> {description2})  '
-                                is_updated = True
-                            if is_updated:
-                                p = param.Output(key, description=description, comment=comment2 if annotate else None)
-                                mod.update_input(p)
-                        else:
-                            p = param.Output(key, description=description, comment='NOTES: add param' if annotate else None)
-                            mod.outputs.append(p)
-
-                        mod_ref = bp.module_output_ref(mod.name, p.name)
-                        is_p_linked = False
-                        for op in bp.outputs:
-                            if hasattr(op, 'value') and mod_ref == op.value:
-                                is_p_linked = True
-                                break
-
-                        if not is_p_linked and key not in bp.list_output_param_names():
-                            bp_output = param.Output(key, description=description, comment='NOTES: add param' if annotate else None)
-                            bp.add_output(bp_output)
-                            bp_bus = bus.WireBus(mod, bp)
-                            bp_bus.add_wire(p.name, bp_output.name)
-
-                    config_output_vars = list(config_json_data['outputs'].keys())
-                    # existing_output_vars = mod.list_input_param_names()
-                    for key in existing_output_vars:
-                        if key not in config_output_vars and annotate:
-                            mod.set_input_attr(key, 'comment', 'TODO: delete param')
-
-        os.chdir(cwd)
+        try:
+            if bp.modules != None and len(bp.modules) > 0:
+                # Fetch & inspect the modules concurrently; merge their parameters in the order of the modules
+                for mod in bp.modules:
+                    module_inspector.submit(mod)
+                for mod in bp.modules:
+                    (config_inputs, config_outputs) = module_inspector.module_params(mod)
+                    self.merge_module_params(bp, mod, config_inputs, config_outputs, annotate)
+        finally:
+            if not shared_inspector:
+                # After an error, the modules not yet started are cancelled
+                module_inspector.shutdown()
+            os.chdir(cwd)
         return bp
 
+    def merge_module_params(self, bp, mod, config_inputs, config_outputs, annotate=False):
+        """
+        Merge the decoded inputs & outputs of the terraform module (see decode_inspection) into the module
+        """
+        #==============================
+        # Processing input variables
+        config_input_vars = [p.name for p in config_inputs]
+        logr.info('Processing inputs: ' + str(config_input_vars))
+        existing_input_vars = mod.list_input_param_names()
+
+        for p in config_inputs:
+            key = p.name
+            type = p.type
+            description = p.description if hasattr(p, 'description') else None
+            val = p.get_value()
+
+            # If key already present in the 'mod', then update parameter
+            if key in existing_input_vars:
+                type2 = mod.get_input_attr(key, "type")
+                description2 = mod.get_input_attr(key, "description")
+                val2 = mod.get_input_attr(key, "value")
+                comment2 = 'NOTES: update param '
+                is_updated = False
+                if type != type2:
+                    comment2 += f'type({type2} --> {type}) '
+                    is_updated = True
+                if description != description2:
+                    comment2 += f'description({description2} --> {description}) '
+                    is_updated = True
+                if val != val2 and not (isinstance(val2, str) and (val2.startswith('$blueprint.') or val2.startswith('$module.'))):
+                    comment2 += f'value({val2} --> {val})'
+                    is_updated = True
+
+                if is_updated:
+                    if annotate:
+                        p.comment = comment2
+                    mod.update_input(p)
+            else:
+                if annotate:
+                    p.comment = 'NOTES: add param'
+                mod.inputs.append(p)
+
+        for key in existing_input_vars:
+            if key not in config_input_vars and annotate:
+                mod.set_input_attr(key, 'comment', 'TODO: delete param')
+
+        #==============================
+        # Processing output variables
+        config_output_vars = [p.name for p in config_outputs]
+        logr.info('Processing outputs: ' + str(config_output_vars))
+        existing_output_vars = mod.list_output_param_names()
+        for p in config_outputs:
+            key = p.name
+            description = p.description if hasattr(p, 'description') else None
+            # If key already present in the 'mod', then skip
+            if key in existing_output_vars:
+                description2 = mod.get_output_attr(key, "description")
+                comment2 = 'NOTES: update param '
+                is_updated = False
+                if description != description2:
+                    comment2 += f'description({description} --> {description2})  '
+                    is_updated = True
+                if is_updated:
+                    if annotate:
+                        p.comment = comment2
+                    mod.update_output(p)
+            else:
+                if annotate:
+                    p.comment = 'NOTES: add param'
+                mod.outputs.append(p)
+
+            mod_ref = bp.module_output_ref(mod.name, p.name)
+            is_p_linked = False
+            for op in bp.outputs:
+                if hasattr(op, 'value') and mod_ref == op.value:
+                    is_p_linked = True
+                    break
+
+            if not is_p_linked and key not in bp.list_output_param_names():
+                bp_output = param.Output(key, type=p.type if hasattr(p, 'type') else None, description=description, comment='NOTES: add param' if annotate else None)
+                bp.add_output(bp_output)
+                bp_bus = bus.WireBus(mod, bp)
+                bp_bus.add_wire(p.name, bp_output.name)
+
+        for key in existing_output_vars:
+            if key not in config_output_vars and annotate:
+                mod.set_output_attr(key, 'comment', 'TODO: delete param')
+
+def write_blueprint(bp, out_file) -> List[event.ValidationEvent]:
+    """
+    Validate & write the synced blueprint to the out_file; returns the validation errors
+    """
+    (out_yaml_str, errors) = bp.to_yaml_str()
+    with open(out_file, 'w') as yaml_file:
+        yaml_file.write(out_yaml_str)
+    return errors
+
+def sync_blueprint_files(bp_files, out_dir, working_dir, annotate=False, parallelism=SyncWorkers, use_cache=True,
+                            inspector=BuiltinInspector, type_patterns_file=None, git_mirror_dir=None):
+    """
+    Sync many blueprint lite files, sharing the downloads & the inspections of their modules:
+    the union of the module git urls (of all the files) is downloaded & inspected once, concurrently;
+    then each synced blueprint is written (concurrently) to the out_dir, with the name of its blueprint lite file.
+
+    :param bp_files: Blueprint lite files (with git_sources)
+    :param out_dir: Folder for the synced blueprint files
+    :param git_mirror_dir: Shared git mirror folder, so that each git repo is fetched once (default: WORKING_DIR/.git-mirror)
+    :return: dict of bp_file -> (output file, List[event.ValidationEvent]), in the order of the bp_files;
+                the output file is None, if the blueprint could not be synced
+    """
+    out_files = dict()
+    bp_file_names = dict()
+    unique_bp_files = []
+    for bp_file in bp_files:
+        name = os.path.basename(bp_file)
+        if name in bp_file_names:
+            if bp_file_names[name] != os.path.abspath(bp_file):
+                raise ValueError('Blueprint lite files with the same name : ' + bp_file_names[name] + ', ' + str(bp_file))
+            # The same file, listed twice
+            continue
+        bp_file_names[name] = os.path.abspath(bp_file)
+        out_files[bp_file] = os.path.join(os.path.abspath(out_dir), name)
+        unique_bp_files.append(bp_file)
+    bp_files = unique_bp_files
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = dict()
+    bp_lites = dict()
+    for bp_file in bp_files:
+        try:
+            bp_lites[bp_file] = BlueprintMorphius.from_yaml_file(bp_file)
+        except (ValueError, KeyError, TypeError) as e:
+            logr.error('Error loading the blueprint lite file ' + str(bp_file) + ' : ' + str(e))
+            results[bp_file] = (None, [event.ValidationEvent(event.BPError, 'Error loading the blueprint lite file', None, str(e))])
+
+    if git_mirror_dir == None:
+        git_mirror_dir = os.path.join(working_dir, '.git-mirror')
+    module_inspector = ModuleInspector(working_dir, parallelism, use_cache, inspector, type_patterns_file, git_mirror_dir)
+    writer = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, parallelism))
+    writes = dict()
+    try:
+        # Start the inspections of all the blueprints, before merging the first one
+        for bm in bp_lites.values():
+            for mod in (bm.modules if bm.modules != None else []):
+                module_inspector.submit(mod)
+        logr.info('Syncing ' + str(len(bp_lites)) + ' blueprints, with ' + str(len(module_inspector.inspections)) + ' distinct modules')
+
+        for bp_file, bm in bp_lites.items():
+            logr.info('Sync - ' + str(bp_file))
+            try:
+                bp = bm.sync_blueprint(working_dir, annotate, module_inspector=module_inspector)
+            except ValueError as e:
+                logr.error('Error synchronizing the blueprint ' + str(bp_file) + ' : ' + str(e))
+                results[bp_file] = (None, [event.ValidationEvent(event.BPError, 'Error synchronizing the blueprint', None, str(e))])
+                continue
+            writes[bp_file] = writer.submit(write_blueprint, bp, out_files[bp_file])
+
+        for bp_file, future in writes.items():
+            results[bp_file] = (out_files[bp_file], future.result())
+    finally:
+        module_inspector.shutdown()
+        writer.shutdown(wait=True)
+
+    return {bp_file: results[bp_file] for bp_file in bp_files}
@@ -12,6 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import yaml
+from typing import List
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
 type_patterns_dict = [
     {
         "pattern":"endswith", 
@@ -37,9 +44,103 @@ type_patterns_dict = [
         "pattern":"endswith", 
         "snippet":["_region", "location"],
         "type":"string"
+    },{
+        "pattern":"endswith", 
+        "snippet":["account"],
+        "type":"string"
     },{
         "pattern":"endswith", 
         "snippet":"count", 
         "type":"integer"
     }
-]
\ No newline at end of file
+]
+
+# Key of the type, in the nodes of the suffix trie (the other keys are single characters)
+TypeKey = ''
+
+def load_type_patterns(patterns_file=None) -> List[dict]:
+    """
+    Type patterns: the builtin type_patterns_dict, followed by the patterns in the user patterns file.
+    The patterns file (yaml or json) is a list of patterns (or a map, with the list in 'type_patterns'), like:
+
+        - pattern: endswith
+          snippets: ["_zone", "_zones"]
+          type: string
+    """
+    patterns = list(type_patterns_dict)
+    if patterns_file == None:
+        return patterns
+    with open(patterns_file) as f:
+        user_patterns = yaml.safe_load(f)
+    if isinstance(user_patterns, dict):
+        user_patterns = user_patterns.get('type_patterns')
+    if not isinstance(user_patterns, list):
+        raise ValueError('Invalid type patterns file : ' + str(patterns_file) + ', expected a list of patterns')
+    patterns.extend(user_patterns)
+    return patterns
+
+class TypeInference:
+
+    def __init__(self, patterns: List[dict] = None):
+        """
+        Infer the type of a parameter from its name, with the 'endswith' type patterns.
+        The snippets of all the patterns are compiled into one trie of the reversed suffixes, so the type
+        of a name is found in a single walk over its characters (from the end), whatever the number of patterns.
+        The longest matching snippet wins (for example, 'account' over 'count', so service_account is a string
+        and instance_count an integer); for the same snippet, the later pattern wins (the user patterns
+        over the builtin patterns).
+
+        :param patterns: Type patterns (see load_type_patterns), defaults to type_patterns_dict
+        """
+        self.suffixes = dict()
+        for pattern in (type_patterns_dict if patterns == None else patterns):
+            self.add_pattern(pattern)
+
+    def add_pattern(self, pattern):
+        if not isinstance(pattern, dict):
+            raise ValueError('Invalid type pattern : ' + str(pattern))
+        if pattern.get('pattern', 'endswith') != 'endswith':
+            raise ValueError('Unsupported type pattern : ' + str(pattern.get('pattern')) + ', expected endswith')
+        snippets = pattern.get('snippets', pattern.get('snippet'))
+        if isinstance(snippets, str):
+            snippets = [snippets]
+        type = pattern.get('type')
+        if not isinstance(snippets, list) or type == None:
+            raise ValueError('Invalid type pattern, expected snippets & type : ' + str(pattern))
+        for snippet in snippets:
+            if snippet == None or len(str(snippet)) == 0:
+                continue
+            node = self.suffixes
+            for ch in reversed(str(snippet).lower()):
+                node = node.setdefault(ch, dict())
+            node[TypeKey] = type
+
+    def infer(self, name) -> str:
+        """
+        Type of the parameter name, from the longest matching snippet (None, if no pattern matches)
+        """
+        if name == None:
+            return None
+        type = None
+        node = self.suffixes
+        for ch in reversed(str(name).lower()):
+            node = node.get(ch)
+            if node == None:
+                break
+            type = node.get(TypeKey, type)
+        return type
+
+    def infer_types(self, params) -> int:
+        """
+        Set the type of the params without type, from their names; returns the number of params typed
+        """
+        count = 0
+        for p in params:
+            if hasattr(p, 'type') and p.type != None:
+                continue
+            type = self.infer(p.name if hasattr(p, 'name') else None)
+            if type != None:
+                logr.debug('Inferred type ' + str(type) + ' for the parameter ' + str(p.name))
+                p.type = type
+                count += 1
+        return count
@@ -0,0 +1,95 @@
+# (C) Copyright IBM Corp. 2022.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+
+from blueprint.lib.logger import logr
+# import logging
+# logr = logging.getLogger(__name__)
+
+# Folder (in the sync working_dir) for the cache of the module inspection results
+CacheFolder = ".blueprint"
+CacheFile = "inspect-cache.db"
+
+# Version of the database schema (sqlite user_version)
+SchemaVersion = 1
+
+SchemaSql = [
+    """CREATE TABLE IF NOT EXISTS inspections (
+        repo        TEXT NOT NULL,
+        commit_sha  TEXT NOT NULL,
+        folder      TEXT NOT NULL,
+        inspector   TEXT NOT NULL,
+        config      TEXT NOT NULL,
+        updated     REAL NOT NULL,
+        PRIMARY KEY (repo, commit_sha, folder, inspector)
+    )"""
+]
+
+class InspectCache:
+
+    def __init__(self, cache_dir):
+        """
+        Persistent cache of the module inspection results (the variables & the outputs of a terraform module).
+        The inspection of a module depends only on its source, so the results are keyed by
+        (repo url, commit sha, folder, inspector version); a cached result is never stale.
+
+        :param cache_dir: Folder for the cache database (for example, the sync working_dir)
+        """
+        self.cache_dir = os.path.join(os.path.abspath(cache_dir), CacheFolder)
+        self.db_file = os.path.join(self.cache_dir, CacheFile)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            with conn:
+                user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if user_version > SchemaVersion:
+                    raise ValueError("Inspection cache " + self.db_file + " was created by a newer version of blueprint (schema " + str(user_version) + ")")
+                for sql in SchemaSql:
+                    conn.execute(sql)
+                conn.execute("PRAGMA user_version = " + str(SchemaVersion))
+
+    def _connect(self):
+        # One connection per call, the cache is used by the sync worker threads
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    def get(self, repo, commit_sha, folder, inspector):
+        """
+        Returns the cached inspection result (dict with the 'variables' and the 'outputs'), or None
+        """
+        if commit_sha == None:
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT config FROM inspections WHERE repo = ? AND commit_sha = ? AND folder = ? AND inspector = ?",
+                                (repo, commit_sha, folder, inspector)).fetchone()
+        if row == None:
+            return None
+        logr.debug("Inspection cache hit for " + repo + " " + folder + " @ " + commit_sha)
+        return json.loads(row[0])
+
+    def put(self, repo, commit_sha, folder, inspector, config):
+        if commit_sha == None or config == None:
+            return
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO inspections (repo, commit_sha, folder, inspector, config, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                                (repo, commit_sha, folder, inspector, json.dumps(config), time.time()))
+
+    def clear(self):
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("DELETE FROM inspections")
@@ -0,0 +1,38 @@
+# Sample terraform module, for the checks of the built-in scanner (see examples/sync/scan_check.py)
+
+variable "region" {
+  type        = string # the region of the resources
+  description = "Region of the resources"
+  default     = "us-south"
+}
+
+variable "instance" {
+  description = "Instance configuration"
+  type = object({
+    # name of the instance
+    name = string // inline comment
+    /* size of the boot volume,
+       in GB */
+    size    = optional(number, 100)
+    profile = optional(string, "cx2-2x4 # not a comment")
+  })
+  default = {
+    name = "vsi"
+  }
+}
+
+variable "zones" {
+  type = list(
+    string /* zone names */
+  )
+  default = ["us-south-1", "us-south-2"]
+}
+
+variable "api_key" {
+  description = <<-EOT
+    API key
+    # (a heredoc line, not a comment)
+  EOT
+  type      = string
+  sensitive = true
+}
@@ -0,0 +1,84 @@
+import sys
+import json
+import time
+import getopt
+import yaml
+
+from blueprint.sync import bpsync
+
+def synthetic_payload(num_vars, num_outputs):
+    # terraform-config-inspect --json output, for a large module
+    variables = dict()
+    for i in range(num_vars):
+        name = "var_" + str(i)
+        var = {"name": name, "type": "string", "description": "Description of the variable " + name,
+                "required": False, "pos": {"filename": "variables.tf", "line": 5 * i + 1}}
+        if i % 4 == 0:
+            var["type"] = "list(object({ name = string, size = number }))"
+            var["default"] = [{"name": "item-" + str(j), "size": j} for j in range(5)]
+        elif i % 4 == 1:
+            var["type"] = "map(string)"
+            var["default"] = {"key-" + str(j): "value-" + str(j) for j in range(5)}
+        elif i % 4 == 2:
+            var["default"] = "value-" + str(i)
+        else:
+            del var["type"]
+            var["default"] = i
+        variables[name] = var
+    outputs = dict()
+    for i in range(num_outputs):
+        name = "out_" + str(i)
+        outputs[name] = {"name": name, "description": "Description of the output " + name,
+                            "pos": {"filename": "outputs.tf", "line": 4 * i + 1}}
+    config = {"path": "/tmp/module", "variables": variables, "outputs": outputs,
+                "required_providers": {"ibm": {"source": "IBM-Cloud/ibm", "version_constraints": [">= 1.41.0"]}}}
+    return json.dumps(config, indent=2).encode("utf-8")
+
+def bench(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None or elapsed < best else best
+    return best
+
+def main(argv):
+    num_vars = 500
+    num_outputs = 200
+    repeat = 5
+
+    try:
+        opts, args = getopt.getopt(argv,"hv:o:r:",["vars=","outputs=","repeat="])
+    except getopt.GetoptError:
+        print('inspect_benchmark.py -v <number_of_variables> -o <number_of_outputs> -r <repeat>')
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print("Usage :")
+            print('   inspect_benchmark.py -v <number_of_variables> -o <number_of_outputs> -r <repeat>')
+            sys.exit()
+        elif opt in ("-v", "--vars"):
+            num_vars = int(arg)
+        elif opt in ("-o", "--outputs"):
+            num_outputs = int(arg)
+        elif opt in ("-r", "--repeat"):
+            repeat = int(arg)
+
+    payload = synthetic_payload(num_vars, num_outputs)
+    print("Inspector payload: " + str(num_vars) + " variables, " + str(num_outputs) + " outputs, " + str(len(payload)) + " bytes")
+
+    # Earlier sync: yaml.safe_load, twice
+    yaml_time = bench(lambda: (yaml.safe_load(payload), yaml.safe_load(payload)), repeat)
+    # json decoding, and decoding into the param.Input & param.Output lists
+    json_time = bench(lambda: bpsync.decode_inspector_json(payload), repeat)
+    decode_time = bench(lambda: bpsync.decode_inspection(bpsync.decode_inspector_json(payload)), repeat)
+
+    print("yaml.safe_load (x2)             : " + str(round(yaml_time * 1000, 2)) + " ms")
+    print("json decoding                   : " + str(round(json_time * 1000, 2)) + " ms")
+    print("json decoding + param lists     : " + str(round(decode_time * 1000, 2)) + " ms")
+    print("speedup                         : " + str(round(yaml_time / decode_time, 1)) + "x")
+
+if __name__ == "__main__":
+   main(sys.argv[1:])
@@ -0,0 +1,64 @@
+import sys
+import getopt
+
+from blueprint.lib import tfscan
+
+# Variables of the sample module (examples/sync/data/scan-module): type, description & default
+Expected = {
+    "region":   {"type": "string", "description": "Region of the resources", "default": "us-south"},
+    "instance": {"type": 'object({ name = string size = optional(number, 100) profile = optional(string, "cx2-2x4 # not a comment") })',
+                    "description": "Instance configuration", "default": {"name": "vsi"}},
+    "zones":    {"type": "list( string )", "default": ["us-south-1", "us-south-2"]},
+    "api_key":  {"type": "string", "description": "API key\n# (a heredoc line, not a comment)\n"},
+}
+ExpectedOutputs = {
+    "instance_id": {"description": "ID of the instance"},
+}
+
+def check(module_dir):
+    config = tfscan.scan_module(module_dir)
+    failures = []
+    for name, expected in Expected.items():
+        var = config["variables"].get(name)
+        if var == None:
+            failures.append("variable " + name + " : not found")
+            continue
+        for key, value in expected.items():
+            if var.get(key) != value:
+                failures.append("variable " + name + " : " + key + " is " + repr(var.get(key)) + ", expected " + repr(value))
+    for name, expected in ExpectedOutputs.items():
+        out = config["outputs"].get(name)
+        if out == None:
+            failures.append("output " + name + " : not found")
+            continue
+        for key, value in expected.items():
+            if out.get(key) != value:
+                failures.append("output " + name + " : " + key + " is " + repr(out.get(key)) + ", expected " + repr(value))
+    return failures
+
+def main(argv):
+    module_dir = './examples/sync/data/scan-module'
+
+    try:
+        opts, args = getopt.getopt(argv,"hd:",["module-dir="])
+    except getopt.GetoptError:
+        print('scan_check.py -d <module_dir>')
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print("Usage :")
+            print('   scan_check.py -d <module_dir>')
+            sys.exit()
+        elif opt in ("-d", "--module-dir"):
+            module_dir = arg
+
+    failures = check(module_dir)
+    for f in failures:
+        print("FAILED - " + f)
+    if len(failures) > 0:
+        sys.exit(1)
+    print("Scanned " + module_dir + " - " + str(len(Expected)) + " variables & " + str(len(ExpectedOutputs)) + " outputs, as expected")
+
+if __name__ == "__main__":
+   main(sys.argv[1:])